@@ -0,0 +1,138 @@
+# article_store.py
+
+"""
+Persistent, queryable SQLite store of analyzed articles.
+
+Every result is kept with its canonical URL, domain, scores and analysis
+time, each indexed so that "was this URL scored in the last 24h?" or "the
+worst articles from a domain" are index lookups. The database runs in WAL
+mode with a busy timeout and takes the write lock up front for each
+transaction, so several Streamlit or batch processes can write to the same
+file concurrently.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from http_cache import canonicalize_url
+
+
+def url_domain(url):
+    """Domain an article URL is filed under: its hostname without 'www.'."""
+    host = (urlsplit(url).hostname or '').rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+class ArticleStore:
+    """
+    Result dicts from credibility_analyzer.analyze() stored by canonical URL
+    (http_cache.canonicalize_url). Results without a URL (pasted text) are
+    stored too, with url and domain left NULL. Safe to share between threads.
+    """
+
+    def __init__(self, path, busy_timeout=30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        with self._write() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY, url TEXT, domain TEXT, title TEXT, final_score REAL, rule_score REAL,
+                ml_score REAL, error TEXT, analyzed_at REAL NOT NULL, result TEXT NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS articles_url ON articles (url, analyzed_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS articles_domain_score ON articles (domain, final_score)")
+            db.execute("CREATE INDEX IF NOT EXISTS articles_score ON articles (final_score)")
+            db.execute("CREATE INDEX IF NOT EXISTS articles_time ON articles (analyzed_at)")
+
+    def _connection(self):
+        # SQLite connections must not cross a fork, so a forked worker
+        # (e.g. in batch_analyzer's pool) opens its own on first use.
+        if self._db is None or self._pid != os.getpid():
+            # Autocommit mode, so transactions are opened explicitly with BEGIN IMMEDIATE.
+            self._db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._db
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes the database write lock at the start, so two
+        # processes never both hold a read lock and deadlock upgrading it; a
+        # busy writer is waited for up to the busy timeout.
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def record(self, result, analyzed_at=None):
+        """Stores one result dict; returns its row id."""
+        return self.record_many([result], analyzed_at)[0]
+
+    def record_many(self, results, analyzed_at=None):
+        """Stores several result dicts in one transaction; returns their row ids."""
+        analyzed_at = time.time() if analyzed_at is None else analyzed_at
+        ids = []
+        with self._write() as db:
+            for result in results:
+                url = result.get('url')
+                row = (canonicalize_url(url) if url else None, url_domain(url) if url else None, result.get('title'),
+                       result.get('final_score'), result.get('rule_score'), result.get('ml_score'), result.get('error'),
+                       analyzed_at, json.dumps(result, default=str))
+                ids.append(db.execute(
+                    "INSERT INTO articles (url, domain, title, final_score, rule_score, ml_score, error, analyzed_at, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row).lastrowid)
+        return ids
+
+    def _query(self, sql, params):
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        return [dict(json.loads(result), analyzed_at=analyzed_at) for result, analyzed_at in rows]
+
+    def recent(self, url, max_age=24 * 3600):
+        """
+        The newest scored result for a URL if it was analyzed within max_age
+        seconds, else None. The returned dict carries 'analyzed_at'.
+        """
+        rows = self._query("SELECT result, analyzed_at FROM articles WHERE url = ? AND analyzed_at >= ? "
+                           "AND error IS NULL ORDER BY analyzed_at DESC LIMIT 1",
+                           (canonicalize_url(url), time.time() - max_age))
+        return rows[0] if rows else None
+
+    def worst_for_domain(self, domain, limit=10):
+        """The lowest-scoring results filed under a domain, worst first."""
+        return self._query("SELECT result, analyzed_at FROM articles WHERE domain = ? AND final_score IS NOT NULL "
+                           "ORDER BY final_score LIMIT ?", (domain, limit))
+
+    def in_score_range(self, low, high, limit=100):
+        """Results with low <= final_score <= high, lowest first."""
+        return self._query("SELECT result, analyzed_at FROM articles WHERE final_score BETWEEN ? AND ? "
+                           "ORDER BY final_score LIMIT ?", (low, high, limit))
+
+    def analyzed_between(self, start, end=None, limit=100):
+        """Results analyzed in [start, end) (end defaults to now), newest first."""
+        end = time.time() if end is None else end
+        return self._query("SELECT result, analyzed_at FROM articles WHERE analyzed_at >= ? AND analyzed_at < ? "
+                           "ORDER BY analyzed_at DESC LIMIT ?", (start, end, limit))
+
+    def count(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
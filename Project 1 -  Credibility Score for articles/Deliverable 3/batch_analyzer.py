@@ -0,0 +1,94 @@
+# batch_analyzer.py
+
+"""
+Multi-core batch scoring on top of credibility_analyzer.analyze().
+
+Inputs are split into chunks and scored in a process pool whose workers load
+TextBlob's lexicon once at start-up. Only a bounded number of chunks is in
+flight at a time, so arbitrarily long iterables can be streamed through.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import credibility_analyzer
+import fetcher
+
+def _init_worker():
+    # Loads TextBlob's sentiment lexicon and any NLTK data it needs once per
+    # process instead of on the first real item.
+    credibility_analyzer.warm_up()
+
+
+def _analyze_chunk(chunk):
+    # Download every URL of the chunk concurrently through the pooled fetcher first;
+    # if that fails as a whole, each URL is fetched again on its own by analyze().
+    urls = [user_input for _, user_input in chunk if user_input.startswith(('http://', 'https://'))]
+    try:
+        pages = dict(zip(urls, fetcher.fetch_urls(urls))) if urls else {}
+    except Exception:
+        pages = {}
+    results = []
+    for index, user_input in chunk:
+        try:
+            result = credibility_analyzer.analyze(user_input, pages.get(user_input))
+        except Exception as e:
+            result = credibility_analyzer.new_result(user_input)
+            result.update(error='internal_error', error_detail=f"{type(e).__name__}: {e}")
+        result['index'] = index
+        results.append(result)
+    return results
+
+
+def _chunks(inputs, chunksize):
+    chunk = []
+    for item in enumerate(inputs):
+        chunk.append(item)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_credibility_batch(inputs, workers=None, ordered=True, chunksize=8, max_pending=4):
+    """
+    Scores an iterable of URLs or article texts across a process pool.
+
+    Yields one result dict per input (see credibility_analyzer.analyze), with
+    its position in the input added under 'index'. With ordered=True results
+    come back in input order, otherwise as soon as each chunk finishes.
+    Failures never stop the batch: they are reported through the result's
+    'error' key ('internal_error' with an 'error_detail' for exceptions).
+
+    workers defaults to the number of CPUs; workers=1 scores in the calling
+    process. At most workers * max_pending chunks are queued at once.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(inputs, chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        limit = workers * max_pending
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_analyze_chunk, chunk))
+            while len(pending) >= limit:
+                yield from _drain(pending, ordered)
+        while pending:
+            yield from _drain(pending, ordered)
+
+
+def _drain(pending, ordered):
+    # Collects at least one finished chunk from the in-flight futures.
+    if ordered:
+        yield from pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield from future.result()
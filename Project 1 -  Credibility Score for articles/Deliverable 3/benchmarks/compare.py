@@ -0,0 +1,55 @@
+# benchmarks/compare.py
+
+"""
+Compares two result files from benchmarks.run.
+
+Prints the median time per document of every benchmark/category pair in
+both runs and the relative change, and exits with status 1 when any pair
+got slower by more than the threshold (default 10%), so it can gate CI.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.05
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare_results(before, after, threshold=0.10):
+    """
+    Returns rows (benchmark, category, before_s, after_s, change, regressed)
+    for the pairs present in both result dicts; change is after / before - 1.
+    """
+    rows = []
+    for name, categories in before['results'].items():
+        for category, stats in categories.items():
+            other = after['results'].get(name, {}).get(category)
+            if other is None:
+                continue
+            change = other['median_s'] / stats['median_s'] - 1 if stats['median_s'] else 0.0
+            rows.append((name, category, stats['median_s'], other['median_s'], change, change > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10, help="Slowdown that counts as a regression.")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+    rows = compare_results(before, after, args.threshold)
+    for name, category, before_s, after_s, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<11} {category:<26} {before_s * 1000:10.3f} -> {after_s * 1000:10.3f} ms/doc {change:+8.1%}{flag}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) over {args.threshold:.0%} in {len(rows)} comparisons")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# benchmarks/corpus.py
+
+"""
+Deterministic synthetic article corpus for the benchmarks.
+
+Articles are built from template sentences in every combination of size
+(short ~80 words, medium ~800 words, large ~200 KB), tone (neutral news
+prose or sensational text with ALL CAPS and '!') and with or without a
+title. Each article also comes as a saved HTML page for extraction
+benchmarks. The same seed always gives the same corpus.
+
+    python -m benchmarks.corpus corpus_dir
+"""
+
+import argparse
+import json
+import os
+import random
+from html import escape
+
+SIZES = {'short': 80, 'medium': 800, 'large': None}
+LARGE_BYTES = 200_000
+TONES = ('neutral', 'sensational')
+
+_SUBJECTS = ['The city council', 'The health ministry', 'Researchers at the university', 'The central bank',
+             'A federal judge', 'The transport agency', 'Local officials', 'The company']
+_VERBS = ['approved', 'published', 'reviewed', 'postponed', 'announced', 'questioned', 'rejected', 'funded']
+_OBJECTS = ['the annual budget', 'a report on water quality', 'new safety rules', 'the merger proposal',
+            'a study of regional hospitals', 'the revised timetable', 'plans for a new bridge', 'the audit findings']
+_TAILS = ['after a public hearing on Tuesday.', 'according to documents seen by reporters.',
+          'citing figures from the statistics office.', 'in a statement released this morning.',
+          'following months of negotiations.', 'despite objections from several members.']
+_SENSATIONAL = ['This is HUGE and nobody is TALKING about it!', 'You will NOT believe what they did next!!',
+                'SHOCKING details are finally coming out!', 'It is an absolute DISASTER, a total scandal!',
+                'They are hiding the TRUTH from you!']
+_NEUTRAL_TITLES = ['Council approves budget after hearing', 'Ministry publishes water quality report',
+                   'Judge postpones ruling on merger']
+_CLICKBAIT_TITLES = ['You won\'t believe what the council did', '10 reasons this budget is a scandal',
+                     'Shocking report: what happens next?']
+
+
+def _sentence(rng, tone):
+    if tone == 'sensational' and rng.random() < 0.3:
+        return rng.choice(_SENSATIONAL)
+    return f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_TAILS)}"
+
+
+def make_article(rng, size, tone, with_title):
+    """One article dict: category, text, title (or None) and an HTML page."""
+    byline = "By Jane Doe and John Smith. "
+    sentences, words, length = [byline], len(byline.split()), len(byline)
+    target_words, target_bytes = SIZES[size], LARGE_BYTES if SIZES[size] is None else None
+    while (words < target_words) if target_bytes is None else (length < target_bytes):
+        sentence = _sentence(rng, tone)
+        sentences.append(sentence + ' ')
+        words += len(sentence.split()); length += len(sentence) + 1
+    text = ''.join(sentences).strip()
+    title = rng.choice(_CLICKBAIT_TITLES if tone == 'sensational' else _NEUTRAL_TITLES) if with_title else None
+    paragraphs = ''.join(f"<p>{escape(' '.join(sentences[i:i + 6]))}</p>" for i in range(0, len(sentences), 6))
+    html = (f"<html><head><title>{escape(title or '')}</title></head><body><nav>Home | World | Politics</nav>"
+            f"<article><h1>{escape(title or '')}</h1>{paragraphs}</article><footer>Contact us</footer></body></html>")
+    return {'category': category_name(size, tone, with_title), 'size': size, 'tone': tone,
+            'text': text, 'title': title, 'html': html}
+
+
+def category_name(size, tone, with_title):
+    return f"{size}-{tone}-{'title' if with_title else 'notitle'}"
+
+
+def generate_corpus(docs_per_size=None, seed=676):
+    """
+    Returns the list of article dicts for every size/tone/title combination;
+    docs_per_size maps a size to how many articles each of its categories gets.
+    """
+    docs_per_size = docs_per_size or {'short': 20, 'medium': 5, 'large': 1}
+    rng = random.Random(seed)
+    return [make_article(rng, size, tone, with_title)
+            for size in SIZES for tone in TONES for with_title in (False, True)
+            for _ in range(docs_per_size[size])]
+
+
+def save_corpus(corpus, directory):
+    """Writes articles as <n>.txt / <n>.html plus a manifest.json."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for n, article in enumerate(corpus):
+        for ext in ('txt', 'html'):
+            with open(os.path.join(directory, f"{n}.{ext}"), 'w', encoding='utf-8') as f:
+                f.write(article['text'] if ext == 'txt' else article['html'])
+        manifest.append({key: article[key] for key in ('category', 'size', 'tone', 'title')})
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def load_corpus(directory):
+    """Reads a corpus written by save_corpus()."""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    corpus = []
+    for n, article in enumerate(manifest):
+        for ext, key in (('txt', 'text'), ('html', 'html')):
+            with open(os.path.join(directory, f"{n}.{ext}"), encoding='utf-8') as f:
+                article[key] = f.read()
+        corpus.append(article)
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the synthetic benchmark corpus to a directory.")
+    parser.add_argument('directory')
+    parser.add_argument('--seed', type=int, default=676)
+    args = parser.parse_args(argv)
+    corpus = generate_corpus(seed=args.seed)
+    save_corpus(corpus, args.directory)
+    print(f"Wrote {len(corpus)} articles to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/import_time.py
+
+"""
+Per-module import-time report for tracking cold-start cost.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+parses the timings CPython writes to stderr and lists the modules with the
+largest cumulative import time. --json saves the full table so two reports
+can be diffed like the benchmark results.
+
+    python -m benchmarks.import_time credibility_analyzer openai_handler --top 15
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr):
+    """
+    Parses -X importtime output into a list of {'module', 'self_us',
+    'cumulative_us', 'depth'} dicts in the order CPython reported them.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({'module': module, 'self_us': int(self_us), 'cumulative_us': int(cumulative_us),
+                         'depth': (len(indent) - 1) // 2})
+    return rows
+
+
+def measure_import(module, python=sys.executable):
+    """Imports a module in a fresh interpreter and returns its parsed import timings."""
+    completed = subprocess.run([python, '-X', 'importtime', '-c', f"import {module}"],
+                               capture_output=True, text=True, check=True)
+    return parse_importtime(completed.stderr)
+
+
+def import_report(module, top=20, python=sys.executable):
+    """
+    Returns {'module', 'total_us', 'slowest'}: the module's own cumulative
+    import time and the `top` imports with the largest cumulative time.
+    """
+    rows = measure_import(module, python)
+    total = next((row['cumulative_us'] for row in rows if row['module'] == module), 0)
+    slowest = sorted(rows, key=lambda row: row['cumulative_us'], reverse=True)[:top]
+    return {'module': module, 'total_us': total, 'slowest': slowest, 'modules': rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-module import times.")
+    parser.add_argument('modules', nargs='+', help="Modules to import, each in a fresh interpreter.")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', help="Also save the full reports to this JSON file.")
+    args = parser.parse_args(argv)
+
+    reports = [import_report(module, args.top) for module in args.modules]
+    for report in reports:
+        print(f"{report['module']}: {report['total_us'] / 1000:.1f} ms")
+        for row in report['slowest']:
+            print(f"  {row['cumulative_us'] / 1000:9.1f} ms cumulative {row['self_us'] / 1000:8.1f} ms self  {row['module']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
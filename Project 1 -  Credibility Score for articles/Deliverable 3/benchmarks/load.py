@@ -0,0 +1,135 @@
+# benchmarks/load.py
+
+"""
+Load generator for scoring_service.
+
+Sends the synthetic corpus texts (no network fetches) to /v1/score, or in
+groups of --batch-size to /v1/score/batch, from --concurrency keep-alive
+connections and reports throughput and latency percentiles. Without a URL
+it starts the service itself with --workers worker processes.
+
+    python -m benchmarks.load --workers 2 --requests 400 --concurrency 8
+    python -m benchmarks.load http://127.0.0.1:8000 --batch-size 16 --json load.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.corpus import generate_corpus
+
+SERVICE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scoring_service.py')
+
+
+def start_service(workers=2, timeout=60):
+    """Starts scoring_service on a free port; returns (process, base URL)."""
+    process = subprocess.Popen([sys.executable, SERVICE, '--port', '0', '--workers', str(workers)],
+                               stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        line = process.stderr.readline()
+        match = re.search(r'Serving on (http://\S+)', line)
+        if match:
+            return process, match.group(1)
+        if not line and process.poll() is not None:
+            break
+    process.kill()
+    raise RuntimeError("scoring_service did not start")
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def run_load(base_url, texts, requests=200, concurrency=8, batch_size=0):
+    """
+    Sends `requests` requests and returns throughput and latency stats.
+    batch_size=0 posts single items, otherwise batches of that many.
+    """
+    address = urlparse(base_url)
+    path = '/v1/score/batch' if batch_size else '/v1/score'
+    latencies, errors, counter = [], [0], iter(range(requests))
+    lock = threading.Lock()
+
+    def body(n):
+        if batch_size:
+            return {'items': [{'text': texts[(n * batch_size + i) % len(texts)]} for i in range(batch_size)]}
+        return {'text': texts[n % len(texts)]}
+
+    def client():
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=120)
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                break
+            payload = json.dumps(body(n)).encode('utf-8')
+            start = time.perf_counter()
+            try:
+                connection.request('POST', path, payload, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += not ok
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {'endpoint': path, 'requests': requests, 'errors': errors[0], 'concurrency': concurrency,
+            'batch_size': batch_size, 'seconds': seconds, 'requests_per_s': requests / seconds,
+            'items_per_s': requests * (batch_size or 1) / seconds,
+            'latency_ms': {name: _percentile(latencies, q) * 1000 for name, q in
+                           (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure scoring_service throughput and latency.")
+    parser.add_argument('url', nargs='?', help="Base URL of a running service (default: start one).")
+    parser.add_argument('--workers', type=int, default=2, help="Worker processes of the started service.")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=0, help="Items per batch request; 0 posts single items.")
+    parser.add_argument('--json', help="Also save the stats to this JSON file.")
+    args = parser.parse_args(argv)
+
+    # Short and medium articles: a request mix closer to chat traffic than the 200 KB pages.
+    texts = [article['text'] for article in generate_corpus({'short': 20, 'medium': 5, 'large': 0})]
+    process, url = (None, args.url) if args.url else start_service(args.workers)
+    try:
+        stats = run_load(url, texts, args.requests, args.concurrency, args.batch_size)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if process is not None:
+        stats['workers'] = args.workers
+    latency = stats['latency_ms']
+    print(f"{stats['endpoint']}: {stats['requests']} requests ({stats['errors']} errors) in {stats['seconds']:.2f} s, "
+          f"{stats['requests_per_s']:.1f} req/s, {stats['items_per_s']:.1f} items/s")
+    print(f"latency ms: p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
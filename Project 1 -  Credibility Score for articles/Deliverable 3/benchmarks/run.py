@@ -0,0 +1,110 @@
+# benchmarks/run.py
+
+"""
+Times the scoring hot paths on the synthetic corpus and saves the results as JSON.
+
+Benchmarks (each over every corpus category):
+
+    rule_based   calculate_rule_based_score(text, url, title)
+    ml           calculate_ml_score(text)
+    extract      extract_content(html) on the saved pages
+    analyze      analyze_credibility(text), the full path including the report
+
+Each benchmark runs `repeats` times per category after one warm-up pass; the
+median and minimum seconds per document are recorded along with documents
+and megabytes per second. Compare two result files with benchmarks.compare.
+
+    python -m benchmarks.run -o before.json
+    python -m benchmarks.run --corpus corpus_dir --repeats 5 -o after.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import credibility_analyzer
+from benchmarks.corpus import generate_corpus, load_corpus
+
+URL = 'https://www.example-news.com/2024/05/budget-report'
+
+BENCHMARKS = {
+    'rule_based': lambda article: credibility_analyzer.calculate_rule_based_score(article['text'], URL, article['title']),
+    'ml': lambda article: credibility_analyzer.calculate_ml_score(article['text']),
+    'extract': lambda article: credibility_analyzer.extract_content(article['html']),
+    'analyze': lambda article: credibility_analyzer.analyze_credibility(article['text']),
+}
+
+
+def time_benchmark(function, articles, repeats):
+    """Seconds per document for each repeat over a list of articles."""
+    for article in articles:
+        function(article)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for article in articles:
+            function(article)
+        timings.append((time.perf_counter() - start) / len(articles))
+    return timings
+
+
+def run_benchmarks(corpus, names=None, repeats=3):
+    """Returns {benchmark: {category: stats}} for the selected benchmarks."""
+    categories = defaultdict(list)
+    for article in corpus:
+        categories[article['category']].append(article)
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = {}
+        for category, articles in categories.items():
+            timings = time_benchmark(BENCHMARKS[name], articles, repeats)
+            median = statistics.median(timings)
+            megabytes = sum(len(a['html' if name == 'extract' else 'text'].encode('utf-8')) for a in articles) / len(articles) / 1e6
+            results[name][category] = {
+                'docs': len(articles), 'repeats': repeats, 'median_s': median, 'min_s': min(timings),
+                'docs_per_s': 1 / median if median else None, 'mb_per_s': megabytes / median if median else None}
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Run metadata saved next to the timings."""
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'git_commit': _git_commit(),
+            'python': sys.version.split()[0], 'platform': platform.platform(), 'machine': platform.machine(),
+            'ml_engine': credibility_analyzer.CONFIG.get('ml_engine')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the credibility scoring hot paths.")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="JSON file for the results.")
+    parser.add_argument('--corpus', help="Directory written by benchmarks.corpus (default: generate in memory).")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument('--ml-engine', choices=['textblob', 'numpy'], help="Override CONFIG['ml_engine'].")
+    args = parser.parse_args(argv)
+
+    if args.ml_engine:
+        credibility_analyzer.CONFIG['ml_engine'] = args.ml_engine
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus()
+    results = run_benchmarks(corpus, args.only, args.repeats)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=1)
+    for name, categories in results.items():
+        for category, stats in categories.items():
+            print(f"{name:<11} {category:<26} {stats['median_s'] * 1000:10.3f} ms/doc {stats['docs_per_s']:10.1f} docs/s")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,21 @@
 # credibility_analyzer.py
 
+# TextBlob (and NLTK), trafilatura and the aiohttp fetcher take most of a
+# second to import, so they are imported where first used (see warm_up()).
+import itertools
+import logging
+import math
+import random
 import re
-import requests
-from bs4 import BeautifulSoup
-from textblob import TextBlob
 from urllib.parse import urlparse
-import trafilatura
+import metrics
+from domain_index import DomainIndex
+from domain_blocklist import DomainBlocklist
+from http_cache import canonicalize_url
+from result_cache import config_version, result_key
+from rules import CLICKBAIT_RE, DEFAULT_RULES, RuleScanner, format_explanation
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 CONFIG = {
@@ -14,96 +24,580 @@ CONFIG = {
         'high_credibility': ['reuters.com', 'apnews.com', 'bbc.com', 'npr.org', 'pbs.org', 'nytimes.com', 'wsj.com', 'washingtonpost.com', 'theguardian.com', 'propublica.org', 'theatlantic.com', 'economist.com', '.gov', '.edu', 'nature.com', 'sciencemag.org', 'thelancet.com', 'cell.com', 'arxiv.org', 'jstor.org', 'pubmed.ncbi.nlm.nih.gov'],
         'medium_credibility': ['forbes.com', 'huffpost.com', 'buzzfeednews.com', 'theverge.com', 'vox.com', 'slate.com', 'vice.com', 'salon.com', 'msnbc.com', 'foxnews.com', 'nypost.com'],
         'low_credibility': ['infowars.com', 'breitbart.com', 'dailycaller.com', 'thegatewaypundit.com', 'naturalnews.com', 'wnd.com', 'theblaze.com', 'dailywire.com', 'theonion.com', 'babylonbee.com', 'worldnewsdailyreport.com']
-    }, 'word_count_threshold': 250
+    },
+    # Memory-mapped blocklist files per tier, built with `python domain_blocklist.py build`.
+    'domain_blocklists': { 'high_credibility': [], 'medium_credibility': [], 'low_credibility': [] },
+    # Declarative body-text rules, see rules.py for the format.
+    'rules': DEFAULT_RULES,
+    # 'textblob', or 'numpy' for the vectorized lexicon engine in fast_sentiment.py.
+    'ml_engine': 'textblob',
+    # Opt-in early exit for triage: a rule-based score (domain tier, sensationalism,
+    # clickbait, ...) outside the uncertainty band settles the result and the ML engine is skipped.
+    'cascade': { 'enabled': False, 'uncertainty_band': (30, 70) },
+    # Opt-in chunked ML scoring for long texts: texts over min_words are scored in chunks of about
+    # chunk_words words, and with max_words set only a stratified sample of that many words is scored.
+    'ml_chunking': { 'enabled': False, 'min_words': 5000, 'chunk_words': 1000, 'max_words': None },
+    # Opt-in reputation learned from the domain_stats aggregates for domains on no list: once a
+    # domain has min_count ML-scored articles, each standard deviation its mean ML score lies
+    # above or below the mean over all domains is worth points_per_std points (capped at max_points).
+    'learned_reputation': { 'enabled': False, 'min_count': 20, 'points_per_std': 10, 'max_points': 15 },
+    'word_count_threshold': 250
 }
 
-def calculate_rule_based_score(text, url=None, title=None):
+# --- Metrics (collected only while metrics.is_enabled()) ---
+STAGE_SECONDS = metrics.histogram('credibility_stage_seconds', "Seconds spent in each analysis stage.", ['stage'])
+ANALYSES = metrics.counter('credibility_analyses_total', "Inputs passed to analyze().")
+ERRORS = metrics.counter('credibility_errors_total', "Inputs that could not be scored, by error code.", ['error'])
+SHORT_INPUTS = metrics.counter('credibility_short_inputs_total', "Inputs rejected as too short to score.")
+NEAR_DUPLICATES = metrics.counter('credibility_near_duplicates_total', "Texts whose ML result was reused from a near-duplicate.")
+DECIDED = metrics.counter('credibility_cascade_decisions_total', "Cascade results by the tier that decided them.", ['tier'])
+
+# Score adjustment and wording for each reputation tier in CONFIG['domains'].
+DOMAIN_TIER_RULES = {
+    'high_credibility': (30, "is highly credible."),
+    'medium_credibility': (5, "is moderately credible."),
+    'low_credibility': (-35, "has low credibility."),
+}
+
+def _build_domain_index():
+    index = DomainIndex.from_tiers(CONFIG['domains'])
+    for tier, paths in CONFIG['domain_blocklists'].items():
+        for path in paths:
+            index.attach(DomainBlocklist(path), tier)
+    return index
+
+# Compiled once from CONFIG; grow it with DOMAIN_INDEX.load_file(path, tier).
+DOMAIN_INDEX = _build_domain_index()
+
+def rebuild_domain_index():
+    """Recompiles DOMAIN_INDEX after CONFIG['domains'] or CONFIG['domain_blocklists'] has been edited."""
+    global DOMAIN_INDEX, _scoring_version
+    DOMAIN_INDEX = _build_domain_index()
+    _scoring_version = None
+    return DOMAIN_INDEX
+
+# Every rule in CONFIG['rules'] compiled into one single-pass scanner.
+RULE_SCANNER = RuleScanner(CONFIG['rules'])
+
+def rebuild_rule_scanner():
+    """Recompiles RULE_SCANNER after CONFIG['rules'] has been edited."""
+    global RULE_SCANNER, _scoring_version
+    RULE_SCANNER = RuleScanner(CONFIG['rules'])
+    _scoring_version = None
+    return RULE_SCANNER
+
+# The settings that only take effect through the rebuild_*() functions above.
+_COMPILED_SETTINGS = ('domains', 'domain_blocklists', 'rules')
+# (DOMAIN_INDEX fingerprint, repr of the other settings, version); reset by the rebuilds.
+_scoring_version = None
+
+def scoring_version():
+    """
+    Fingerprint of everything scores depend on, which keys the result cache
+    and near-duplicate entries. It is recomputed only after a rebuild, a
+    change to DOMAIN_INDEX's contents (entries added through load_file, an
+    attached blocklist file rebuilt in place; see DomainIndex.fingerprint)
+    or an edit of the small settings (weights, ml_engine, cascade, ...),
+    which are compared by repr.
+    """
+    global _scoring_version
+    settings = repr([item for item in CONFIG.items() if item[0] not in _COMPILED_SETTINGS])
+    index = DOMAIN_INDEX.fingerprint()
+    if _scoring_version is None or _scoring_version[:2] != (index, settings):
+        version = config_version(dict(CONFIG, domain_index=index))
+        _scoring_version = (index, settings, version)
+    return _scoring_version[2]
+
+def rule_based_analysis(text, url=None, title=None, metadata=None, text_features=None):
+    """
+    calculate_rule_based_score() that also returns the features it scored:
+    (score, explanations, features) with every rule feature of RULE_SCANNER,
+    'word_count', 'clickbait', 'domain' and 'domain_tier'. metadata is the
+    page metadata from extract_article(), e.g. to credit a real byline.
+    text_features, the result of RULE_SCANNER.scan() on this text (or a
+    near-duplicate of it), skips the body scan; only the URL, title and
+    metadata rules are then evaluated afresh.
+    """
     score = 50
     explanations = []
+    domain = tier = learned = None
     if url:
-        domain = urlparse(url).netloc.replace('www.', '')
-        domain_found = False
-        for high_cred_domain in CONFIG['domains']['high_credibility']:
-            if domain.endswith(high_cred_domain):
-                score += 30; explanations.append(f"[+30] **Source Reputation**: Domain '{domain}' is highly credible."); domain_found = True; break
-        if not domain_found:
-            for med_cred_domain in CONFIG['domains']['medium_credibility']:
-                if domain.endswith(med_cred_domain):
-                    score += 5; explanations.append(f"[+5] **Source Reputation**: Domain '{domain}' is moderately credible."); domain_found = True; break
-        if not domain_found:
-            for low_cred_domain in CONFIG['domains']['low_credibility']:
-                if domain.endswith(low_cred_domain):
-                    score -= 35; explanations.append(f"[-35] **Source Reputation**: Domain '{domain}' has low credibility."); domain_found = True; break
-        if not domain_found:
+        parsed = urlparse(url)
+        domain = parsed.netloc.replace('www.', '')
+        tier = DOMAIN_INDEX.lookup(parsed.hostname)
+        if tier in DOMAIN_TIER_RULES:
+            points, description = DOMAIN_TIER_RULES[tier]
+            score += points; explanations.append(f"[{points:+d}] **Source Reputation**: Domain '{domain}' {description}")
+        elif (learned := learned_reputation(domain)) is not None:
+            points, description = learned
+            score += points; explanations.append(format_explanation(points, "Source Reputation", description))
+        else:
             explanations.append("[+/- 0] **Source Reputation**: Domain is not on predefined lists.")
-    if re.search(r'\b(by|author)\s+([A-Z][a-z]+(\s+[A-Z][a-z]+)+)', text[:500], re.IGNORECASE):
-        score += 10; explanations.append("[+10] **Author Presence**: An author byline was found.")
-    else:
-        score -= 5; explanations.append("[-5] **Author Presence**: No clear author byline detected.")
-    if re.search(r'\b(sources|references|citations|bibliography)\b', text, re.IGNORECASE):
-        score += 15; explanations.append("[+15] **Citations**: The article appears to cite sources.")
+    if text_features is None:
+        features = RULE_SCANNER.scan(text, metadata)
     else:
-        explanations.append("[+/- 0] **Citations**: No dedicated sources section found.")
-    num_all_caps = len(re.findall(r'\b[A-Z]{4,}\b', text)); num_exclamations = text.count('!')
+        features = RULE_SCANNER.apply_metadata({name: text_features[name] for name in text_feature_names()}, metadata)
+    points, rule_explanations = RULE_SCANNER.score(features)
+    score += points; explanations += rule_explanations
+    num_all_caps = features['all_caps']; num_exclamations = features['exclamations']
     if num_all_caps > 5 or num_exclamations > 5:
         penalty = min((num_all_caps + num_exclamations - 10) * 2, 20); score -= penalty
         explanations.append(f"[-{penalty}] **Sensationalism**: Excessive use of ALL CAPS or '!' detected.")
     else:
         explanations.append("[+/- 0] **Sensationalism**: Language appears temperate.")
+    features['clickbait'] = bool(title and CLICKBAIT_RE.search(title))
     if title:
-        clickbait_patterns = [r'\b(will blow your mind|you won\'t believe|shocking|secret|what happens next)\b', r'\?$', r'^\d+\s+(reasons|tips|tricks|ways)\s+']
-        if any(re.search(p, title, re.IGNORECASE) for p in clickbait_patterns):
+        if features['clickbait']:
             score -= 15; explanations.append("[-15] **Headline Analysis**: The title appears to be clickbait.")
         else:
             explanations.append("[+/- 0] **Headline Analysis**: Title seems straightforward.")
-    word_count = len(text.split())
+    word_count = features['word_count']
     if word_count < CONFIG['word_count_threshold']:
         score -= 10; explanations.append(f"[-10] **Article Depth**: The article is very short ({word_count} words).")
     else:
         explanations.append(f"[+/- 0] **Article Depth**: Article has sufficient length ({word_count} words).")
-    return max(0, min(100, score)), explanations
+    features.update(domain=domain, domain_tier=tier)
+    if learned is not None: features['learned_reputation'] = learned[0]
+    return max(0, min(100, score)), explanations, features
 
-def calculate_ml_score(text):
-    if not text or not text.strip(): return 0, ["[-100] **Text Content**: No text could be extracted."]
-    blob = TextBlob(text); explanations = []
-    subjectivity = blob.sentiment.subjectivity; subjectivity_score = (1 - subjectivity) * 100
+# Optional domain_stats.DomainStats fed by every scored result, see set_domain_stats().
+_domain_stats = None
+
+def set_domain_stats(stats):
+    """
+    Keeps running per-domain score aggregates in stats (None disables it);
+    with CONFIG['learned_reputation'] enabled they score unlisted domains.
+    """
+    global _domain_stats
+    _domain_stats = stats
+
+def learned_reputation(domain):
+    """
+    (points, explanation) for an unlisted domain from its aggregates in the
+    domain stats, or None when disabled or the domain has too few articles.
+    Based on ML scores, which the reputation points never feed back into.
+    """
+    settings = CONFIG['learned_reputation']
+    if _domain_stats is None or not settings['enabled']: return None
+    entry, overall = _domain_stats.get(domain), _domain_stats.overall()
+    if entry is None or entry['ml'].count < settings['min_count'] or not overall['ml'].std: return None
+    ml, average = entry['ml'], overall['ml'].mean
+    points = round((ml.mean - average) / overall['ml'].std * settings['points_per_std'])
+    points = max(-settings['max_points'], min(settings['max_points'], points))
+    return points, (f"Domain '{domain}' is not on predefined lists; its {ml.count} scored articles average "
+                    f"{ml.mean:.1f} in linguistic analysis against {average:.1f} across all domains.")
+
+def _learned_points(url):
+    # The learned reputation points rule_based_analysis() would give the URL's domain, or None.
+    if not url or _domain_stats is None or not CONFIG['learned_reputation']['enabled']: return None
+    parsed = urlparse(url)
+    if DOMAIN_INDEX.lookup(parsed.hostname) in DOMAIN_TIER_RULES: return None
+    learned = learned_reputation(parsed.netloc.replace('www.', ''))
+    return None if learned is None else learned[0]
+
+def text_feature_names():
+    """The features RULE_SCANNER.scan() derives from the body text alone."""
+    return [rule['name'] for rule in RULE_SCANNER.rules] + ['word_count']
+
+def calculate_rule_based_score(text, url=None, title=None, text_features=None):
+    score, explanations, _ = rule_based_analysis(text, url, title, text_features=text_features)
+    return score, explanations
+
+_NO_TEXT_EXPLANATION = "[-100] **Text Content**: No text could be extracted."
+
+# Built on first use by the 'numpy' engine; loading the lexicon arrays takes a moment.
+_lexicon_sentiment = None
+
+def _get_lexicon_sentiment():
+    global _lexicon_sentiment
+    if _lexicon_sentiment is None:
+        from fast_sentiment import LexiconSentiment
+        _lexicon_sentiment = LexiconSentiment()
+    return _lexicon_sentiment
+
+def _ml_score_from_sentiment(polarity, subjectivity):
+    explanations = []
+    subjectivity_score = (1 - subjectivity) * 100
     if subjectivity > 0.6: explanation = f"High Subjectivity ({subjectivity:.2f}). The text seems heavily opinion-based."
     elif subjectivity < 0.3: explanation = f"High Objectivity ({subjectivity:.2f}). The text appears to be fact-based."
     else: explanation = f"Moderate Subjectivity ({subjectivity:.2f}). A mix of facts and opinion."
     explanations.append(f"**Linguistic Analysis**: {explanation}")
-    polarity = abs(blob.sentiment.polarity); polarity_score = (1 - polarity) * 100
-    if polarity > 0.5: explanation = f"Strong Sentiment ({blob.sentiment.polarity:.2f}). Language is highly emotional."
-    else: explanation = f"Neutral Sentiment ({blob.sentiment.polarity:.2f}). The tone is relatively neutral."
+    polarity_score = (1 - abs(polarity)) * 100
+    if abs(polarity) > 0.5: explanation = f"Strong Sentiment ({polarity:.2f}). Language is highly emotional."
+    else: explanation = f"Neutral Sentiment ({polarity:.2f}). The tone is relatively neutral."
     explanations.append(f"**Sentiment Analysis**: {explanation}")
     return max(0, min(100, (subjectivity_score + polarity_score) / 2)), explanations
 
-def get_content_from_url(url):
+def text_sentiment(text):
+    """(polarity, subjectivity) of a text from the engine in CONFIG['ml_engine']."""
+    if CONFIG['ml_engine'] == 'numpy':
+        return _get_lexicon_sentiment().sentiment(text)
+    from textblob import TextBlob
+    sentiment = TextBlob(text).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+# Chunks end at a paragraph break or after a sentence.
+_CHUNK_BREAK_RE = re.compile(r'\n\s*\n|(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'\S+')
+
+def _chunk_bounds(text, chunk_words):
+    # (start, end, words) of consecutive chunks of at least chunk_words words (the last may be shorter).
+    # Text that runs on without a break (no punctuation, one-line lists) is cut between words at
+    # 2 * chunk_words words, so no chunk is longer than that.
+    limit = 2 * chunk_words
+    start = position = words = 0
+    for match in itertools.chain(_CHUNK_BREAK_RE.finditer(text), [None]):
+        end = match.start() if match else len(text)
+        # n words take at least 2n - 1 characters, so a short span cannot reach the limit.
+        if (end - position + 1) // 2 <= limit - words:
+            words += len(text[position:end].split())
+        else:
+            for word in _WORD_RE.finditer(text, position, end):
+                if words == limit:
+                    yield start, word.start(), words
+                    start, words = word.start(), 0
+                words += 1
+        if match is None: break
+        position = match.end()
+        if words >= chunk_words:
+            yield start, match.start(), words
+            start, words = position, 0
+    if words: yield start, len(text), words
+
+def chunked_sentiment(text, chunk_words=1000, max_words=None, seed=0):
+    """
+    (polarity, subjectivity, sampling) of a text scored chunk by chunk, so
+    the ML engine never holds more than 2 * chunk_words words at once.
+    Chunk results are averaged weighted by their word counts.
+
+    With max_words set and a longer text, the chunks are split into
+    max_words // chunk_words equal strata by position and one chunk per
+    stratum is scored, which caps the cost. sampling reports 'total_words',
+    'analyzed_words', 'chunks', 'analyzed_chunks' and 'margin': the 95%
+    margin of error of the ML score in points (0 when everything was scored).
+    """
+    bounds = list(_chunk_bounds(text, chunk_words))
+    total_words = sum(words for _, _, words in bounds)
+    selected = bounds
+    if max_words and total_words > max_words and len(bounds) > 1:
+        strata = max(1, min(len(bounds), max_words // chunk_words))
+        rng = random.Random(seed)
+        selected = [rng.choice(bounds[i * len(bounds) // strata:(i + 1) * len(bounds) // strata]) for i in range(strata)]
+    weight = polarity = subjectivity = 0.0
+    chunk_scores = []
+    for start, end, words in selected:
+        p, s = text_sentiment(text[start:end])
+        weight += words; polarity += p * words; subjectivity += s * words
+        chunk_scores.append((words, _ml_score_from_sentiment(p, s)[0]))
+    if not weight: return 0.0, 0.0, {'total_words': 0, 'analyzed_words': 0, 'chunks': 0, 'analyzed_chunks': 0, 'margin': 0.0}
+    margin = 0.0
+    if selected is not bounds:
+        # Standard error of the weighted mean chunk score, with the finite population correction.
+        mean = sum(w * x for w, x in chunk_scores) / weight
+        variance = sum(w * (x - mean) ** 2 for w, x in chunk_scores) / weight
+        margin = 1.96 * math.sqrt((1 - weight / total_words) * variance / len(selected))
+    return polarity / weight, subjectivity / weight, {
+        'total_words': total_words, 'analyzed_words': int(weight), 'chunks': len(bounds),
+        'analyzed_chunks': len(selected), 'margin': margin}
+
+def _sampling_explanation(sampling):
+    if sampling['analyzed_words'] == sampling['total_words']:
+        return f"**Chunked Analysis**: Scored in {sampling['chunks']} chunks of {sampling['total_words']:,} words."
+    return (f"**Sampled Analysis**: Scored {sampling['analyzed_words']:,} of {sampling['total_words']:,} words "
+            f"({sampling['analyzed_chunks']} of {sampling['chunks']} chunks); the score is accurate to "
+            f"±{sampling['margin']:.1f} points at 95% confidence.")
+
+def _use_chunking(text, chunking):
+    # Counts words without building the list text.split() would.
+    if not chunking['enabled'] or len(text) < chunking['min_words']: return False
+    return sum(1 for _ in _WORD_RE.finditer(text)) >= chunking['min_words']
+
+def ml_sentiment(text):
+    """
+    (polarity, subjectivity, sampling) of a text: chunked_sentiment() when
+    CONFIG['ml_chunking'] applies to it, else text_sentiment() with sampling None.
+    """
+    chunking = CONFIG['ml_chunking']
+    if _use_chunking(text, chunking):
+        return chunked_sentiment(text, chunking['chunk_words'], chunking['max_words'])
+    return text_sentiment(text) + (None,)
+
+def calculate_ml_score(text):
+    if not text or not text.strip(): return 0, [_NO_TEXT_EXPLANATION]
+    polarity, subjectivity, sampling = ml_sentiment(text)
+    score, explanations = _ml_score_from_sentiment(polarity, subjectivity)
+    if sampling is not None: explanations.append(_sampling_explanation(sampling))
+    return score, explanations
+
+def calculate_ml_scores(texts):
+    """
+    calculate_ml_score() for many texts at once. With the 'numpy' engine the
+    whole list is scored in one vectorized pass.
+    """
+    texts = list(texts)
+    if CONFIG['ml_engine'] != 'numpy':
+        return [calculate_ml_score(text) for text in texts]
+    scored = [i for i, text in enumerate(texts) if text and text.strip()]
+    polarity, subjectivity = _get_lexicon_sentiment().sentiment_batch([texts[i] for i in scored])
+    results = [(0, [_NO_TEXT_EXPLANATION]) for _ in texts]
+    for i, p, s in zip(scored, polarity.tolist(), subjectivity.tolist()):
+        results[i] = _ml_score_from_sentiment(p, s)
+    return results
+
+def extract_article(downloaded):
+    """
+    Parses a downloaded HTML page once and returns a dict with the body
+    'text', the page's <title> and the 'author', 'date' and 'sitename'
+    metadata found in the same tree (None when missing).
+    """
+    from trafilatura import bare_extraction
+    from trafilatura.utils import load_html
+    with STAGE_SECONDS.time('extract'):
+        tree = load_html(downloaded)
+        if tree is None: return {'text': None, 'title': None, 'author': None, 'date': None, 'sitename': None}
+        # Read before extraction, which prunes the tree in place.
+        title_element = tree.find('.//title')
+        title = (title_element.text or None) if title_element is not None else "No Title Found"
+        # Only the page's own date markup is checked; a full-text date search costs more than the extraction.
+        document = bare_extraction(tree, include_comments=False, include_tables=False, with_metadata=True,
+                                   date_extraction_params={'extensive_search': False, 'original_date': True})
+    if document is None: return {'text': None, 'title': title, 'author': None, 'date': None, 'sitename': None}
+    return {'text': document.text or None, 'title': title, 'author': document.author, 'date': document.date, 'sitename': document.sitename}
+
+def extract_content(downloaded):
+    """Extracts (text, title) from a downloaded HTML page."""
+    article = extract_article(downloaded)
+    return article['text'], article['title']
+
+def get_article_from_url(url, downloaded=None):
+    """
+    Downloads a page through the pooled fetcher and returns extract_article()'s
+    dict, or None if nothing could be downloaded or extracted.
+    Pass downloaded to reuse HTML that was already fetched, e.g. in a batch.
+    """
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if not downloaded: return None, None
-        text = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
-        soup = BeautifulSoup(downloaded, 'html.parser')
-        title = soup.find('title').string if soup.find('title') else "No Title Found"
-        return text, title
+        if downloaded is None:
+            import fetcher
+            with STAGE_SECONDS.time('fetch'): downloaded = fetcher.fetch_url(url)
+        if not downloaded: return None
+        return extract_article(downloaded)
     except Exception as e:
-        print(f"Error extracting content: {e}"); return None, None
+        logger.warning("Error extracting content from %s: %s", url, e); return None
 
-def analyze_credibility(user_input):
-    text, url, title = "", None, ""
+def get_content_from_url(url, downloaded=None):
+    """
+    Downloads a page through the pooled fetcher and extracts (text, title).
+    Pass downloaded to reuse HTML that was already fetched, e.g. in a batch.
+    """
+    article = get_article_from_url(url, downloaded)
+    if article is None: return None, None
+    return article['text'], article['title']
+
+# Optional result_cache.ResultCache in front of the rule and ML scorers, see set_result_cache().
+_result_cache = None
+
+def set_result_cache(cache):
+    """Enables (or with None disables) caching of scores by article content."""
+    global _result_cache
+    _result_cache = cache
+
+# Optional near_duplicates.NearDuplicateIndex of scored texts, see set_near_duplicate_index().
+_near_duplicates = None
+
+def set_near_duplicate_index(index):
+    """
+    Enables (or with None disables) reuse of the text-derived scores of a
+    near-duplicate article, e.g. a wire story already scored on another site.
+    """
+    global _near_duplicates
+    _near_duplicates = index
+
+def score_text(text, url=None, title=None, metadata=None):
+    """
+    Runs the rule-based and ML scorers, answering from the result cache when
+    the same text, title, domain and metadata were scored under the same CONFIG.
+    Returns a dict with rule_score, rule_explanations, ml_score,
+    ml_explanations, features (see rule_based_analysis, plus 'polarity'
+    and 'subjectivity') and decided_by.
+
+    With CONFIG['cascade'] enabled, a rule score outside the uncertainty band
+    decides on its own: decided_by is 'rules' and ml_score, polarity and
+    subjectivity are None. Otherwise decided_by is 'ml' (None without the cascade).
+
+    With a near-duplicate index set, a text matching an already scored one
+    reuses its body features (length, sensationalism, citations, ...) and
+    ML result; the URL, title and metadata rules are still evaluated, and
+    features['near_duplicate'] names the matched article and its similarity.
+    """
+    return _score_text(text, url, title, metadata)[0]
+
+def _score_text(text, url, title, metadata):
+    # score_text() that also tells whether the scores were computed now (False for a cache hit).
+    key = version = None
+    if _result_cache is not None or _near_duplicates is not None:
+        version = scoring_version()
+    if _result_cache is not None:
+        domain = urlparse(url).netloc if url else None
+        # Learned reputation moves as the domain's aggregates grow, so its points are part of the key.
+        learned = _learned_points(url)
+        key = result_key(text, title, domain, version if learned is None else f"{version}:{learned}", metadata)
+        cached = _result_cache.get(key)
+        if cached is not None and 'features' in cached:
+            return cached, False
+    signature = text_features = reused = None
+    if _near_duplicates is not None:
+        with STAGE_SECONDS.time('dedup'):
+            signature = _near_duplicates.signature(text)
+            # Scores from another CONFIG (rules, ML engine, ...) are not reused.
+            match = _near_duplicates.lookup(text, signature, version)
+        if match is not None:
+            reused, similarity = match
+            text_features = reused['text_features']
+        else:
+            # Scanned without metadata so the features can be reused by copies on other sites.
+            text_features = RULE_SCANNER.scan(text)
+    with STAGE_SECONDS.time('rules'):
+        rule_score, rule_explanations, features = rule_based_analysis(text, url, title, metadata, text_features)
+    decided_by = None
+    if CONFIG['cascade']['enabled']:
+        low, high = CONFIG['cascade']['uncertainty_band']
+        decided_by = 'rules' if rule_score < low or rule_score > high else 'ml'
+        DECIDED.inc(decided_by)
+    if decided_by == 'rules':
+        polarity = subjectivity = ml_score = None
+        ml_explanations = [f"**Skipped**: The rule-based score is outside the uncertainty band ({low}-{high})."]
+    elif reused is not None:
+        NEAR_DUPLICATES.inc()
+        polarity, subjectivity, ml_score = reused['polarity'], reused['subjectivity'], reused['ml_score']
+        ml_explanations = reused['ml_explanations'] + [
+            f"**Near-Duplicate**: Reused from an already scored article with {similarity:.0%} similar text."]
+        features['near_duplicate'] = {'url': reused['url'], 'similarity': similarity}
+        if reused.get('ml_sampling'): features['ml_sampling'] = reused['ml_sampling']
+    else:
+        with STAGE_SECONDS.time('ml'):
+            polarity, subjectivity, sampling = ml_sentiment(text)
+            ml_score, ml_explanations = _ml_score_from_sentiment(polarity, subjectivity)
+        if sampling is not None:
+            ml_explanations.append(_sampling_explanation(sampling))
+            features['ml_sampling'] = sampling
+        if signature is not None:
+            _near_duplicates.add(text, {'url': url, 'text_features': text_features, 'polarity': polarity,
+                                        'subjectivity': subjectivity, 'ml_score': ml_score,
+                                        'ml_explanations': ml_explanations, 'ml_sampling': sampling}, signature, version)
+    features.update(polarity=polarity, subjectivity=subjectivity)
+    scores = {'rule_score': rule_score, 'rule_explanations': rule_explanations,
+              'ml_score': ml_score, 'ml_explanations': ml_explanations, 'features': features, 'decided_by': decided_by}
+    if key is not None:
+        _result_cache.put(key, scores)
+    return scores, True
+
+# Optional article_store.ArticleStore that keeps every scored result, see set_article_store().
+_article_store = None
+_article_store_reuse_for = 0
+
+def set_article_store(store, reuse_for=0):
+    """
+    Records every scored result in an article store (None disables it). With
+    reuse_for > 0, analyze() answers a URL scored within that many seconds
+    from the store instead of downloading and scoring it again.
+    """
+    global _article_store, _article_store_reuse_for
+    _article_store, _article_store_reuse_for = store, reuse_for
+
+# Report lines for inputs that cannot be scored, keyed by the result's 'error' code.
+ERROR_MESSAGES = {
+    'fetch_failed': "❌ **Error**: Could not retrieve content from the URL.",
+    'too_short': "⚠️ **Warning**: Input is too short for a meaningful credibility analysis.",
+    'internal_error': "❌ **Error**: The analysis failed unexpectedly. Please try again.",
+}
+
+def new_result(user_input):
+    """An unscored result dict for an input, with every key analyze() reports."""
+    return {'input': user_input, 'url': None, 'title': None, 'final_score': None, 'rule_score': None,
+            'ml_score': None, 'rule_explanations': [], 'ml_explanations': [], 'features': {}, 'metadata': {}, 'decided_by': None, 'error': None}
+
+def score_content(result, text):
+    """
+    Scores extracted article text into a result from new_result(), using its
+    url, title and metadata, or marks it 'too_short'. Returns the result.
+    """
+    if len(text.split()) < 50:
+        SHORT_INPUTS.inc(); result['error'] = 'too_short'; return result
+    scores, fresh = _score_text(text, result['url'], result['title'], result['metadata'])
+    if scores['ml_score'] is None:
+        # Decided by the rule tier alone (see score_text): its score is the final score.
+        final_score = scores['rule_score']
+    else:
+        final_score = (scores['rule_score'] * CONFIG['weights']['rule_based']) + (scores['ml_score'] * CONFIG['weights']['ml_based'])
+    result.update(scores, final_score=final_score)
+    if _article_store is not None: _article_store.record(result)
+    # Only newly scored articles feed the aggregates, each URL once (see domain_stats).
+    if _domain_stats is not None and fresh and scores['features'].get('domain'):
+        _domain_stats.update(scores['features']['domain'], final_score, scores['ml_score'],
+                             article=canonicalize_url(result['url']) if result['url'] else None)
+    return result
+
+def analyze(user_input, downloaded=None):
+    """
+    Scores a URL or article text and returns a structured result dict with the
+    url, title, final/rule/ML scores, their explanations and the scored
+    features (see score_text). When the input cannot be scored, 'error' holds
+    a key of ERROR_MESSAGES and the scores are None.
+    For URLs, downloaded may carry the already fetched HTML.
+    """
+    ANALYSES.inc()
+    with STAGE_SECONDS.time('analyze'):
+        result = _analyze(user_input, downloaded)
+    if result['error'] and result['error'] != 'too_short': ERRORS.inc(result['error'])
+    return result
+
+def _analyze(user_input, downloaded):
+    result = new_result(user_input)
     if user_input.startswith(('http://', 'https://')):
-        url = user_input
-        text, title = get_content_from_url(url)
-        if not text: return "❌ **Error**: Could not retrieve content from the URL."
+        if _article_store is not None and _article_store_reuse_for > 0:
+            stored = _article_store.recent(user_input, _article_store_reuse_for)
+            if stored is not None: return dict(stored, input=user_input)
+        article = get_article_from_url(user_input, downloaded) or {}
+        text = article.pop('text', None)
+        result.update(url=user_input, title=article.pop('title', None), metadata=article)
+        if not text: result['error'] = 'fetch_failed'; return result
     else:
         text = user_input
-    if len(text.split()) < 50: return "⚠️ **Warning**: Input is too short for a meaningful credibility analysis."
-    rule_score, rule_explanations = calculate_rule_based_score(text, url, title)
-    ml_score, ml_explanations = calculate_ml_score(text)
-    final_score = (rule_score * CONFIG['weights']['rule_based']) + (ml_score * CONFIG['weights']['ml_based'])
+    return score_content(result, text)
+
+def render_report(result):
+    """Renders a result from analyze() as the Markdown credibility report."""
+    if result['error']: return ERROR_MESSAGES[result['error']]
+    decided_by = result.get('decided_by')
+    if decided_by == 'rules':
+        weights = ("100%", "skipped")
+        decision = ["*Decided by the rule-based tier: the result is clear without the linguistic analysis.*"]
+    else:
+        weights = (f"{CONFIG['weights']['rule_based']:.0%}", f"{CONFIG['weights']['ml_based']:.0%}")
+        decision = ["*Decided by the linguistic tier: the rule-based score alone was inconclusive.*"] if decided_by == 'ml' else []
     report_lines = [
-        "##  Credibility Analysis Report", f"### **Final Credibility Score: `{final_score:.2f} / 100.00`**", "---",
-        "#### Detailed Breakdown:", f"##### Rule-Based Analysis (Weight: {CONFIG['weights']['rule_based']:.0%})", f"* **Score:** `{rule_score:.2f}`"
-    ] + [f"* {exp}" for exp in rule_explanations] + [
-        f"\n##### Linguistic Analysis (Weight: {CONFIG['weights']['ml_based']:.0%})", f"* **Score:** `{ml_score:.2f}`"
-    ] + [f"* {exp}" for exp in ml_explanations]
-    return "\n".join(report_lines)
\ No newline at end of file
+        "##  Credibility Analysis Report", f"### **Final Credibility Score: `{result['final_score']:.2f} / 100.00`**"] + decision + ["---",
+        "#### Detailed Breakdown:", f"##### Rule-Based Analysis (Weight: {weights[0]})", f"* **Score:** `{result['rule_score']:.2f}`"
+    ] + [f"* {exp}" for exp in result['rule_explanations']] + [
+        f"\n##### Linguistic Analysis (Weight: {weights[1]})"
+    ] + ([f"* **Score:** `{result['ml_score']:.2f}`"] if result['ml_score'] is not None else []) + [f"* {exp}" for exp in result['ml_explanations']]
+    return "\n".join(report_lines)
+
+_WARM_UP_TEXT = "The committee published its annual report on regional water quality this week. " * 8
+
+def warm_up():
+    """
+    Imports the NLP and fetch stack and loads the sentiment lexicon ahead of
+    the first analysis. Safe to run in a background thread: analyses started
+    meanwhile wait on the imports instead of failing.
+    """
+    import fetcher  # noqa: F401  (aiohttp is the slowest import of the fetch path)
+    extract_article("<html><head><title>warm-up</title></head><body><p>warm-up</p></body></html>")
+    calculate_ml_score(_WARM_UP_TEXT)
+
+def analyze_credibility(user_input):
+    """Scores a URL or article text and returns the Markdown report."""
+    result = analyze(user_input)
+    with STAGE_SECONDS.time('report'):
+        return render_report(result)
+
@@ -0,0 +1,174 @@
+# domain_blocklist.py
+
+"""
+Compact, mmap-backed domain set for multi-million-entry reputation feeds.
+
+File layout (little-endian):
+
+    header   magic 'CREDBL01', num_hashes (u32), reserved (u32),
+             count (u64), bloom_bits (u64)
+    bloom    bloom_bits / 8 bytes, padded to a multiple of 8 (may be empty)
+    hashes   count sorted, unique u64 hashes of the normalized domains
+
+Only 8 bytes per domain (plus the optional Bloom filter) are stored, and the
+file is opened read-only with mmap, so every worker process shares the same
+physical pages. A lookup hashes each suffix of the hostname, probes the Bloom
+filter and binary-searches the hash array.
+
+Build a file from a plain text feed with:
+
+    python domain_blocklist.py build feed.txt low_credibility.cdbl
+"""
+
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from domain_index import iter_domain_lines, normalize_domain
+
+MAGIC = b'CREDBL01'
+_HEADER = struct.Struct('<8sIIQQ')
+
+
+def domain_hash(domain):
+    """64-bit hash of a normalized domain ('bbc.co.uk')."""
+    return int.from_bytes(hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class DomainBlocklist:
+    """
+    Read-only view of a blocklist file. Instances are cheap: the data stays in
+    the page cache and is never copied into Python objects.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("Domain blocklists can only be memory-mapped on little-endian hosts.")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_hashes, _, self.count, self.bloom_bits = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a domain blocklist file.")
+        bloom_start = _HEADER.size
+        hashes_start = bloom_start + _padded(self.bloom_bits // 8)
+        view = memoryview(self._mmap)
+        self._bloom = view[bloom_start:bloom_start + self.bloom_bits // 8]
+        self._hashes = view[hashes_start:hashes_start + 8 * self.count].cast('Q')
+
+    def __len__(self):
+        return self.count
+
+    def fingerprint(self):
+        """Identifies the file's current contents by its size, modification time and inode."""
+        stat = os.stat(self.path)
+        return f"{os.fspath(self.path)}:{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+
+    def __contains__(self, domain):
+        return self._contains_hash(domain_hash('.'.join(normalize_domain(domain))))
+
+    def _contains_hash(self, h):
+        bloom_bits = self.bloom_bits
+        if bloom_bits:
+            # Kirsch-Mitzenmacher double hashing from the two halves of the hash.
+            bloom, pos, step = self._bloom, h & 0xFFFFFFFF, (h >> 32) | 1
+            for _ in range(self.num_hashes):
+                pos %= bloom_bits
+                if not bloom[pos >> 3] & (1 << (pos & 7)):
+                    return False
+                pos += step
+        i = bisect.bisect_left(self._hashes, h)
+        return i < self.count and self._hashes[i] == h
+
+    def match_depth(self, labels, min_depth=0):
+        """
+        Given hostname labels (see domain_index.normalize_domain), returns the
+        number of labels in the longest listed suffix, or 0. Suffixes of
+        min_depth labels or fewer are not checked.
+        """
+        for start in range(len(labels) - min_depth):
+            if self._contains_hash(domain_hash('.'.join(labels[start:]))):
+                return len(labels) - start
+        return 0
+
+    def match(self, hostname):
+        """Returns the longest listed suffix of the hostname, or None."""
+        labels = normalize_domain(hostname or '')
+        depth = self.match_depth(labels)
+        return '.'.join(labels[-depth:]) if depth else None
+
+    def close(self):
+        self._hashes.release()
+        self._bloom.release()
+        self._mmap.close()
+
+
+def _padded(n):
+    return (n + 7) // 8 * 8
+
+
+def build_blocklist(domains, path, bits_per_entry=10, num_hashes=4):
+    """
+    Writes an iterable of domains to a blocklist file. bits_per_entry=0 skips
+    the Bloom prefilter. The default of 10 bits and 4 hashes gives about a 1%
+    false positive rate, each of which only costs a binary search, while
+    keeping the probes per lookup low. Returns the number of unique domains
+    written.
+    """
+    import numpy as np
+
+    hashes = np.fromiter(
+        (domain_hash('.'.join(labels)) for labels in map(normalize_domain, domains) if labels),
+        dtype='<u8')
+    hashes = np.unique(hashes)
+    bloom_bits = _padded(int(len(hashes) * bits_per_entry)) if bits_per_entry and len(hashes) else 0
+    bloom = np.zeros(bloom_bits // 8, dtype=np.uint8)
+    if bloom_bits:
+        h1, h2 = hashes & np.uint64(0xFFFFFFFF), (hashes >> np.uint64(32)) | np.uint64(1)
+        for i in range(num_hashes):
+            pos = (h1 + np.uint64(i) * h2) % np.uint64(bloom_bits)
+            np.bitwise_or.at(bloom, (pos >> np.uint64(3)).astype(np.intp),
+                             (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, num_hashes if bloom_bits else 0, 0, len(hashes), bloom_bits))
+        f.write(bloom.tobytes())
+        f.write(b'\0' * (_padded(len(bloom)) - len(bloom)))
+        f.write(hashes.tobytes())
+    return len(hashes)
+
+
+def build_blocklist_from_feed(feed_path, path, encoding='utf-8', **kwargs):
+    """Builds a blocklist from a text feed in the format DomainIndex.load_file reads."""
+    with open(feed_path, encoding=encoding, errors='replace') as f:
+        return build_blocklist(iter_domain_lines(f), path, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query mmap-backed domain blocklists.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Turn a plain text domain feed into a blocklist file.")
+    build.add_argument('feed', help="Text feed, one domain per line ('#' comments and hosts-file lines allowed).")
+    build.add_argument('output', help="Blocklist file to write.")
+    build.add_argument('--bits-per-entry', type=float, default=10, help="Bloom filter size; 0 disables it.")
+    build.add_argument('--num-hashes', type=int, default=4)
+    query = commands.add_parser('query', help="Look up hostnames in a blocklist file.")
+    query.add_argument('blocklist')
+    query.add_argument('hostnames', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_blocklist_from_feed(args.feed, args.output, bits_per_entry=args.bits_per_entry, num_hashes=args.num_hashes)
+        print(f"Wrote {count} domains to {args.output}")
+    else:
+        blocklist = DomainBlocklist(args.blocklist)
+        for hostname in args.hostnames:
+            print(f"{hostname}\t{blocklist.match(hostname) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
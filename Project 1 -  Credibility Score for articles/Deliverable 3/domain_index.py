@@ -0,0 +1,146 @@
+# domain_index.py
+
+"""
+Reverse-label suffix index for the domain reputation tiers.
+
+Domains are stored label by label from the TLD inwards ('news.bbc.com' is
+stored as com -> bbc -> news), so a lookup walks at most one node per label
+of the hostname, no matter how many domains are registered. Matching always
+happens on whole labels: 'notreuters.com' does not match 'reuters.com'.
+"""
+
+import hashlib
+
+# Key under which a node stores its tier. Labels are never empty, so it
+# cannot collide with a child label.
+_TIER = ''
+
+
+def normalize_domain(domain):
+    """
+    Turns a list entry or hostname into its labels, e.g. '.gov' -> ['gov'].
+    Returns an empty list for entries that contain no usable label.
+    """
+    domain = domain.strip().lower().rstrip('.')
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    return [label for label in domain.split('.') if label]
+
+
+class DomainIndex:
+    """
+    Maps domain suffixes to credibility tiers and finds the most specific
+    tier for a hostname in O(number of labels).
+    """
+
+    def __init__(self):
+        self._root = {}
+        self._size = 0
+        self._external = []
+        # Sum of 64-bit hashes of every registered (tier, suffix), see fingerprint().
+        self._content_hash = 0
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_tiers(cls, tiers):
+        """
+        Builds an index from a {tier: [domain, ...]} mapping such as
+        CONFIG['domains']. Tiers are registered in mapping order.
+        """
+        index = cls()
+        for tier, domains in tiers.items():
+            index.add_many(domains, tier)
+        return index
+
+    def add(self, domain, tier):
+        """
+        Registers a domain suffix under a tier. A suffix keeps the first tier it
+        was registered under, so earlier (higher priority) tiers win on
+        duplicates. Returns True if the suffix was new.
+        """
+        labels = normalize_domain(domain)
+        if not labels:
+            return False
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        if _TIER in node:
+            return False
+        node[_TIER] = tier
+        self._size += 1
+        digest = hashlib.blake2b(f"{tier}\0{'.'.join(labels)}".encode('utf-8'), digest_size=8).digest()
+        self._content_hash = (self._content_hash + int.from_bytes(digest, 'little')) & 0xFFFFFFFFFFFFFFFF
+        return True
+
+    def add_many(self, domains, tier):
+        """Registers every domain in an iterable. Returns how many were new."""
+        return sum(1 for domain in domains if self.add(domain, tier))
+
+    def load_file(self, path, tier, encoding='utf-8'):
+        """
+        Bulk-loads a domain list with one entry per line into a tier. Blank
+        lines and '#' comments are skipped, and hosts-file lines
+        ('0.0.0.0 example.com') use their last field. Returns how many new
+        suffixes were added.
+        """
+        with open(path, encoding=encoding) as f:
+            return self.add_many(iter_domain_lines(f), tier)
+
+    def attach(self, domain_set, tier):
+        """
+        Consults an external domain set (e.g. a memory-mapped
+        domain_blocklist.DomainBlocklist) for a tier without loading it into
+        the trie. It must provide match_depth(labels, min_depth).
+        """
+        self._external.append((domain_set, tier))
+
+    def fingerprint(self):
+        """
+        String that changes with the index's contents: the registered
+        suffixes and tiers (whatever order they were added in) and, for each
+        attached set, its own fingerprint() if it has one (a blocklist file's
+        size and modification time).
+        """
+        parts = [f"{self._size}:{self._content_hash:016x}"]
+        for domain_set, tier in self._external:
+            fingerprint = getattr(domain_set, 'fingerprint', None)
+            parts.append(f"{tier}={fingerprint() if fingerprint else id(domain_set)}")
+        return '|'.join(parts)
+
+    def match(self, hostname):
+        """
+        Returns (tier, matched_suffix) for the most specific registered
+        suffix of the hostname, or None if no suffix is registered.
+        """
+        if not hostname:
+            return None
+        labels = normalize_domain(hostname)
+        node, found, depth = self._root, None, 0
+        for i, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                break
+            if _TIER in node:
+                found, depth = node[_TIER], i
+        for domain_set, tier in self._external:
+            external_depth = domain_set.match_depth(labels, min_depth=depth)
+            if external_depth > depth:
+                found, depth = tier, external_depth
+        if found is None:
+            return None
+        return found, '.'.join(labels[-depth:])
+
+    def lookup(self, hostname):
+        """Returns only the tier of the most specific match, or None."""
+        result = self.match(hostname)
+        return result[0] if result else None
+
+
+def iter_domain_lines(lines):
+    """Yields the domain from each non-blank, non-comment line of a list."""
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if line:
+            yield line.split()[-1]
@@ -0,0 +1,182 @@
+# domain_stats.py
+
+"""
+Running per-domain aggregates of the scores the analyzer produces.
+
+For every domain (and '*' for all of them together) the store keeps the
+count, mean and variance of the final and ML scores, updated with
+Welford's algorithm, plus a 101-bin histogram of the rounded scores that
+answers quantile queries. Recording a result and looking a domain up are
+both O(1): nothing ever rescans past results. Results passed with an
+article id (the analyzer uses the canonical URL) count once however often
+that article is re-analyzed; an 8-byte digest of each id is remembered.
+With a path the aggregates are kept in SQLite and reloaded on start; each
+update is merged into the stored row under the database write lock, so
+processes sharing the file (batch workers, the scoring service's workers)
+add up rather than overwrite each other. A process's in-memory copy of a
+domain is refreshed whenever it records a result for that domain.
+
+    stats = DomainStats('domain_stats.sqlite')
+    credibility_analyzer.set_domain_stats(stats)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+ALL_DOMAINS = '*'
+METRICS = ('final', 'ml')
+
+
+class RunningStats:
+    """Count, mean, variance and a score histogram (0-100) of a stream of values."""
+
+    __slots__ = ('count', 'mean', 'm2', 'histogram')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, histogram=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.histogram = histogram or [0] * 101
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.histogram[min(100, max(0, int(round(value))))] += 1
+
+    @property
+    def variance(self):
+        """Population variance (0 for fewer than two values)."""
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def quantile(self, q):
+        """Score below which a q fraction of the values fall, to the nearest point; None when empty."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for score, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and seen:
+                return score
+        return 100
+
+    def summary(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std,
+                'p10': self.quantile(0.1), 'median': self.quantile(0.5), 'p90': self.quantile(0.9)}
+
+
+class DomainStats:
+    """
+    {domain: {'final': RunningStats, 'ml': RunningStats}} kept up to date one
+    result at a time; path=None keeps the aggregates in memory only.
+    """
+
+    def __init__(self, path=None):
+        self._stats = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.path = path
+        self._db = None
+        self._pid = None
+        if path:
+            db = self._connection()
+            db.execute("""CREATE TABLE IF NOT EXISTS domain_stats (
+                domain TEXT NOT NULL, metric TEXT NOT NULL, count INTEGER NOT NULL, mean REAL NOT NULL,
+                m2 REAL NOT NULL, histogram TEXT NOT NULL, PRIMARY KEY (domain, metric))""")
+            db.execute("CREATE TABLE IF NOT EXISTS seen_articles (digest BLOB PRIMARY KEY)")
+            db.commit()
+            for domain, metric, count, mean, m2, histogram in db.execute("SELECT * FROM domain_stats"):
+                self._entry(domain)[metric] = RunningStats(count, mean, m2, json.loads(histogram))
+            self._seen = {digest for digest, in db.execute("SELECT digest FROM seen_articles")}
+
+    def _connection(self):
+        # SQLite connections must not cross a fork, so a forked worker (batch_analyzer's
+        # pool, the scoring service's workers) opens its own on first use.
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._db
+
+    def _entry(self, domain):
+        entry = self._stats.get(domain)
+        if entry is None:
+            entry = self._stats[domain] = {metric: RunningStats() for metric in METRICS}
+        return entry
+
+    def update(self, domain, final_score, ml_score=None, article=None):
+        """
+        Adds one scored article of a domain (ml_score None when the ML tier
+        did not run). An article id that was already counted is skipped;
+        returns whether the result was counted.
+        """
+        digest = hashlib.blake2b(article.encode('utf-8', 'surrogatepass'), digest_size=8).digest() if article else None
+        with self._lock:
+            if digest is not None:
+                if digest in self._seen:
+                    return False
+                self._seen.add(digest)
+            values = (('final', final_score), ('ml', ml_score))
+            if self.path is None:
+                for key in (domain, ALL_DOMAINS):
+                    entry = self._entry(key)
+                    for metric, value in values:
+                        if value is not None:
+                            entry[metric].add(value)
+                return True
+            db = self._connection()
+            # BEGIN IMMEDIATE holds the write lock from the read to the write back,
+            # so another process's update to the same rows cannot slip in between.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if digest is not None and not db.execute("INSERT OR IGNORE INTO seen_articles VALUES (?)", (digest,)).rowcount:
+                    # Already counted by another process.
+                    db.rollback()
+                    return False
+                for key in (domain, ALL_DOMAINS):
+                    entry = self._entry(key)
+                    for metric, value in values:
+                        if value is None:
+                            continue
+                        row = db.execute("SELECT count, mean, m2, histogram FROM domain_stats WHERE domain = ? AND metric = ?",
+                                         (key, metric)).fetchone()
+                        stats = RunningStats(row[0], row[1], row[2], json.loads(row[3])) if row else RunningStats()
+                        stats.add(value)
+                        db.execute("INSERT OR REPLACE INTO domain_stats VALUES (?, ?, ?, ?, ?, ?)",
+                                   (key, metric, stats.count, stats.mean, stats.m2, json.dumps(stats.histogram)))
+                        entry[metric] = stats
+            except BaseException:
+                db.rollback()
+                raise
+            db.commit()
+            return True
+
+    def get(self, domain):
+        """{'final': RunningStats, 'ml': RunningStats} of a domain, or None if it was never scored."""
+        return self._stats.get(domain)
+
+    def overall(self):
+        """The aggregates over every domain."""
+        return self._stats.get(ALL_DOMAINS)
+
+    def summary(self, domain):
+        """Plain-dict summary (count, mean, std, p10, median, p90 per metric) of a domain, or None."""
+        entry = self._stats.get(domain)
+        return {metric: stats.summary() for metric, stats in entry.items()} if entry else None
+
+    def __len__(self):
+        return len(self._stats) - (ALL_DOMAINS in self._stats)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
@@ -0,0 +1,194 @@
+# fast_sentiment.py
+
+"""
+Vectorized NumPy re-implementation of TextBlob's default (pattern) sentiment.
+
+TextBlob walks every word of a document in Python, tracking a preceding
+intensifier ("very good") and a preceding negation ("not good"). Both states
+are reset at every lexicon word, so everything they depend on is local to a
+word and the gap before it. LexiconSentiment loads the lexicon into arrays
+once, turns a batch of documents into one token id array and evaluates that
+state machine with cumulative maxima, gathers and bincounts, without a
+Python loop over words.
+
+Compared with TextBlob(text).sentiment it differs only in tokenization and
+in what it leaves out:
+
+* tokens are runs of letters/digits (internal hyphens and dots kept) and '!';
+  TextBlob's abbreviation, contraction and URL handling is not reproduced;
+* emoticons and the sarcasm mark '(!)' are ignored.
+
+Most prose documents match TextBlob exactly, and the mean absolute
+difference stays below TOLERANCE. Single documents can be further off when
+a few assessments decide the score and one of them hinges on tokenization,
+typically emoticons, e-mail addresses or URLs in short, code-like text.
+"""
+
+import re
+
+import numpy as np
+
+# Mean absolute difference from TextBlob's polarity and subjectivity over a
+# corpus of prose; a bound on the average, not on every document.
+TOLERANCE = 0.02
+
+NEGATIONS = ('no', 'not', 'never')
+_TOKEN_RE = re.compile(r"[^\W_](?:[^\s'\"“”‘’!?,;:()\[\]{}]*[^\W_])?|!")
+
+# Token classes for words that are not in the lexicon; only their length,
+# and whether they are a negation or '!', matter to the algorithm.
+_UNKNOWN_CLASSES = ('short', 'two', 'long', 'negation_two', 'negation_long', 'exclamation')
+
+
+class _Vocabulary(dict):
+    # Maps tokens to ids; unknown tokens are classified on first sight and
+    # memoized up to a bound so the dict cannot grow without limit.
+    def __init__(self, words, limit):
+        super().__init__((w, i) for i, w in enumerate(words))
+        self._base = len(words)
+        self._lexicon_size = len(self)
+        self._limit = limit
+
+    def __missing__(self, token):
+        if token == '!':
+            cls = 'exclamation'
+        elif token in NEGATIONS:
+            cls = 'negation_two' if len(token) <= 2 else 'negation_long'
+        else:
+            cls = 'short' if len(token) <= 1 else 'two' if len(token) == 2 else 'long'
+        token_id = self._base + _UNKNOWN_CLASSES.index(cls)
+        if len(self) - self._lexicon_size < self._limit:
+            self[token] = token_id
+        return token_id
+
+
+class LexiconSentiment:
+    """
+    Batch sentiment scorer over TextBlob's English lexicon.
+
+    sentiment(text) returns (polarity, subjectivity) like
+    TextBlob(text).sentiment; sentiment_batch(texts) scores many documents
+    in one vectorized pass.
+    """
+
+    def __init__(self, lexicon=None, vocabulary_limit=500_000):
+        if lexicon is None:
+            from textblob.en import sentiment as lexicon
+            lexicon.load()
+        words = [w for w in dict.keys(lexicon) if ' ' not in w]
+        size = len(words) + len(_UNKNOWN_CLASSES)
+        self.polarity = np.zeros(size)
+        self.subjectivity = np.zeros(size)
+        self.intensity = np.ones(size)
+        self.known = np.zeros(size, dtype=bool)
+        self.modifier = np.zeros(size, dtype=bool)
+        self.ly = np.zeros(size, dtype=bool)
+        for i, word in enumerate(words):
+            senses = dict.__getitem__(lexicon, word)
+            self.polarity[i], self.subjectivity[i], self.intensity[i] = senses[None]
+            self.known[i] = True
+            self.modifier[i] = 'RB' in senses
+            self.ly[i] = word.endswith('ly')
+        base = len(words)
+        unknown = {cls: base + i for i, cls in enumerate(_UNKNOWN_CLASSES)}
+        self.negation = np.zeros(size, dtype=bool)
+        self.negation[[unknown['negation_two'], unknown['negation_long']]] = True
+        self.exclamation = np.zeros(size, dtype=bool)
+        self.exclamation[unknown['exclamation']] = True
+        # TextBlob drops a carried intensifier after words longer than two
+        # characters and a carried negation after words longer than one.
+        self.long_for_modifier = np.zeros(size, dtype=bool)
+        self.long_for_modifier[[unknown['long'], unknown['negation_long']]] = True
+        self.long_for_negation = np.zeros(size, dtype=bool)
+        self.long_for_negation[[unknown['two'], unknown['long'], unknown['negation_two'], unknown['negation_long']]] = True
+        self.vocabulary = _Vocabulary(words, vocabulary_limit)
+
+    def token_ids(self, text):
+        """Tokenizes a document into an array of vocabulary ids."""
+        tokens = _TOKEN_RE.findall(text.lower())
+        return np.fromiter(map(self.vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+
+    def sentiment(self, text):
+        polarity, subjectivity = self.sentiment_batch([text])
+        return float(polarity[0]), float(subjectivity[0])
+
+    def sentiment_batch(self, texts):
+        """Returns (polarity, subjectivity) arrays with one entry per text."""
+        ids_per_doc = [self.token_ids(text) for text in texts]
+        n_docs = len(ids_per_doc)
+        lengths = np.fromiter((len(ids) for ids in ids_per_doc), dtype=np.int64, count=n_docs)
+        if not lengths.sum():
+            return np.zeros(n_docs), np.zeros(n_docs)
+        ids = np.concatenate(ids_per_doc)
+        n = len(ids)
+        idx = np.arange(n)
+        doc = np.repeat(np.arange(n_docs), lengths)
+        doc_first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        doc_start = np.zeros(n, dtype=bool)
+        doc_start[doc_first[lengths > 0]] = True
+
+        known = self.known[ids]
+        negation = self.negation[ids]
+        last_known = np.maximum.accumulate(np.where(known, idx, -1))
+        has_known = last_known >= doc_first[doc]
+        mword_ly = has_known & self.ly[ids[np.maximum(last_known, 0)]]
+
+        # Carried intensifier: set by a lexicon adverb, cleared by any other
+        # lexicon word or a long unknown word (unless it is a negation
+        # attached to an '-ly' intensifier: "really not good").
+        unknown = ~known
+        m_set = known & self.modifier[ids]
+        m_clear = (known & ~self.modifier[ids]) | (unknown & self.long_for_modifier[ids] & ~(negation & mword_ly))
+        m_before = self._state_before(m_set, m_clear, doc_start, idx)
+        ly_attach = unknown & negation & m_before & mword_ly
+
+        # Carried negation: set by a negation word, cleared by lexicon words,
+        # unknown words longer than one character and '-ly' attachment.
+        n_set = negation & ~ly_attach
+        n_clear = known | (unknown & ~negation & self.long_for_negation[ids]) | ly_attach
+        n_before = self._state_before(n_set, n_clear, doc_start, idx)
+
+        # One assessment per chain of lexicon words joined by intensifiers.
+        k = np.flatnonzero(known)
+        if not len(k):
+            return np.zeros(n_docs), np.zeros(n_docs)
+        k_ids = ids[k]
+        merged = m_before[k]
+        negated = n_before[k]
+        intensity = self.intensity[k_ids]
+        effective = np.where(negated, 1.0 / np.where(intensity == 0, 1.0, intensity), intensity)
+        previous = np.concatenate(([1.0], effective[:-1]))
+        p = np.where(merged, np.clip(self.polarity[k_ids] * previous, -1.0, 1.0), self.polarity[k_ids])
+        s = np.where(merged, np.clip(self.subjectivity[k_ids] * previous, -1.0, 1.0), self.subjectivity[k_ids])
+        chain = np.cumsum(~merged) - 1
+        n_chains = chain[-1] + 1
+        is_last = np.append(~merged[1:], True)
+        last = np.flatnonzero(is_last)
+
+        chain_negated = np.zeros(n_chains, dtype=bool)
+        chain_negated[chain[negated]] = True
+        ordinal = np.cumsum(known) - 1
+        chain_negated[chain[ordinal[ly_attach]]] = True
+        # '!' strengthens the current assessment, unless a later word merges into it.
+        boosts = self.exclamation[ids] & has_known
+        boosts &= is_last[np.maximum(ordinal, 0)]
+        boost_count = np.bincount(chain[ordinal[boosts]], minlength=n_chains)
+
+        chain_p = np.clip(p[last] * 1.25 ** boost_count, -1.0, 1.0)
+        chain_p = np.where(chain_negated, chain_p * -0.5, chain_p)
+        chain_doc = doc[k[last]]
+        counts = np.maximum(np.bincount(chain_doc, minlength=n_docs), 1)
+        polarity = np.bincount(chain_doc, chain_p, minlength=n_docs) / counts
+        subjectivity = np.bincount(chain_doc, s[last], minlength=n_docs) / counts
+        return polarity, subjectivity
+
+    @staticmethod
+    def _state_before(set_events, clear_events, doc_start, idx):
+        # Whether a flag is on just before each token, given the tokens that
+        # set and clear it; every document starts with the flag off.
+        last_set = np.maximum.accumulate(np.where(set_events, idx, -1))
+        last_clear = np.maximum.accumulate(np.where(clear_events | np.roll(doc_start, -1), idx, -1))
+        after = last_set > last_clear
+        before = np.concatenate(([False], after[:-1]))
+        before[doc_start] = False
+        return before
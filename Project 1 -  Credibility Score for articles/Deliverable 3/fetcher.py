@@ -0,0 +1,209 @@
+# fetcher.py
+
+"""
+Pooled asyncio HTTP fetch layer used instead of trafilatura.fetch_url.
+
+One aiohttp session per process keeps connections alive between requests,
+caps concurrency globally and per host, caches DNS lookups, and retries
+timeouts, connection errors and 429/5xx answers with jittered exponential
+backoff. Synchronous callers go through fetch_url()/fetch_urls(), which run
+the coroutines on a background event loop owned by the process.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import threading
+
+import aiohttp
+from trafilatura.utils import decode_file
+
+import metrics
+from http_cache import HttpCache
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying; everything else is final.
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+FETCHED_BYTES = metrics.counter('credibility_fetched_bytes_total', "Page bytes fetched, by source (network or cache).", ['source'])
+FETCH_RETRIES = metrics.counter('credibility_fetch_retries_total', "Download attempts that were retried.")
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; CredibilityAnalyzer/1.0)',
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+}
+
+
+class AsyncFetcher:
+    """
+    Fetches pages over a shared, keep-alive connection pool.
+
+    concurrency and per_host cap the open connections overall and per host,
+    timeout is the total seconds allowed per attempt, and retries is how many
+    extra attempts a retryable failure gets. Sleeps between attempts are drawn
+    uniformly from [0, backoff * 2 ** attempt] ("full jitter"). With an
+    http_cache.HttpCache, cached pages are revalidated with a conditional GET
+    and a 304 answer is served from disk.
+    """
+
+    def __init__(self, concurrency=32, per_host=4, timeout=15.0, retries=2, backoff=0.5,
+                 dns_ttl=300, keepalive=30.0, max_bytes=20_000_000, headers=None, cache=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.max_bytes = max_bytes
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.cache = cache
+        self._session = None
+
+    async def _get_session(self):
+        # The session must be created inside the loop that will use it.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                             ttl_dns_cache=self.dns_ttl, keepalive_timeout=self.keepalive)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def fetch_bytes(self, url, headers=None):
+        """
+        Downloads a URL and returns (status, body bytes, response headers).
+        Raises the last error once the retries are used up; non-retryable
+        statuses are returned as is.
+        """
+        session = await self._get_session()
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status in RETRY_STATUSES and not last_attempt:
+                        await response.release()
+                    else:
+                        # content.read(n) returns only what is buffered, so read to EOF chunk by chunk.
+                        chunks, size = [], 0
+                        async for chunk in response.content.iter_chunked(65536):
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise ValueError(f"Response from {url} exceeds {self.max_bytes} bytes.")
+                            chunks.append(chunk)
+                        return response.status, b''.join(chunks), response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+            FETCH_RETRIES.inc()
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def fetch(self, url):
+        """Returns the decoded HTML of a URL, or None if it could not be downloaded."""
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and entry['fresh']:
+            body = self.cache.read(entry)
+            if body is not None:
+                FETCHED_BYTES.inc('cache', amount=len(body))
+                return decode_file(body)
+        try:
+            status, body, headers = await self.fetch_bytes(url, self.cache.validators(entry) if entry else None)
+            if status == 304 and entry:
+                body = self.cache.read(entry, revalidated=True)
+                if body is not None:
+                    FETCHED_BYTES.inc('cache', amount=len(body))
+                    return decode_file(body)
+                # The cached object vanished: download it again without validators.
+                status, body, headers = await self.fetch_bytes(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning("Error fetching %s: %s", url, e); return None
+        if status != 200 or not body:
+            return None
+        FETCHED_BYTES.inc('network', amount=len(body))
+        if self.cache:
+            self.cache.store(url, body, headers.get('ETag'), headers.get('Last-Modified'))
+        return decode_file(body)
+
+    async def fetch_many(self, urls):
+        """Fetches URLs concurrently (within the pool limits), in input order."""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# --- Synchronous bridge ---
+
+_loop = None
+_loop_pid = None
+_fetcher = None
+_lock = threading.RLock()
+
+
+def _get_loop():
+    # One daemon loop thread per process; forked children start their own.
+    global _loop, _loop_pid, _fetcher
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _fetcher = None
+            threading.Thread(target=_loop.run_forever, name='fetcher-loop', daemon=True).start()
+        return _loop
+
+
+def get_fetcher():
+    """
+    Returns the process-wide fetcher used by fetch_url() and fetch_urls().
+    It caches pages on disk when CREDIBILITY_HTTP_CACHE_DIR is set.
+    """
+    global _fetcher
+    with _lock:
+        _get_loop()
+        if _fetcher is None:
+            cache_dir = os.getenv("CREDIBILITY_HTTP_CACHE_DIR")
+            _fetcher = AsyncFetcher(cache=HttpCache(cache_dir) if cache_dir else None)
+        return _fetcher
+
+
+def set_fetcher(fetcher):
+    """Replaces the process-wide fetcher, e.g. to change its limits."""
+    global _fetcher
+    with _lock:
+        _get_loop()
+        old, _fetcher = _fetcher, fetcher
+    if old is not None:
+        run(old.close())
+
+
+@atexit.register
+def _close_session():
+    # Closes the pooled session while the loop thread still runs, so aiohttp does not
+    # warn about an unclosed session at interpreter exit.
+    with _lock:
+        if _fetcher is None or _loop_pid != os.getpid():
+            return
+        current, loop = _fetcher, _loop
+    try:
+        asyncio.run_coroutine_threadsafe(current.close(), loop).result(timeout=5)
+    except Exception:
+        pass
+
+
+def run(coroutine):
+    """Runs a coroutine on the background fetch loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_loop()).result()
+
+
+def fetch_url(url):
+    """Synchronous drop-in for trafilatura.fetch_url: decoded HTML or None."""
+    return run(get_fetcher().fetch(url))
+
+
+def fetch_urls(urls):
+    """Fetches several URLs concurrently; returns decoded HTML or None per URL."""
+    return run(get_fetcher().fetch_many(list(urls)))
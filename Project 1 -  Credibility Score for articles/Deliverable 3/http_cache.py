@@ -0,0 +1,174 @@
+# http_cache.py
+
+"""
+Content-addressed on-disk cache of downloaded pages.
+
+Bodies are stored once per SHA-256 digest under objects/ (optionally
+zlib-compressed), and a small SQLite index maps each canonical URL to its
+digest plus the ETag / Last-Modified validators needed for a conditional GET.
+The least recently used URLs are evicted once the stored bytes exceed
+max_bytes.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the visitor and never change the page.
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'mc_cid', 'mc_eid', 'igshid', 'ref_src'}
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url):
+    """
+    Normalizes a URL so trivially different spellings share one key: lowercase
+    scheme and host, no default port, fragment or tracking parameters
+    (utm_* and TRACKING_PARAMS), sorted query, and '/' for an empty path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS)
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class HttpCache:
+    """
+    Stores raw page bodies with their validators. Safe to share between threads;
+    several processes may use the same directory.
+
+    fresh_for is how many seconds after a download or revalidation a page is
+    served without contacting the server at all (0 always revalidates).
+    stats counts 'hits' (bodies served from disk), 'revalidations' (hits
+    confirmed by a 304), 'misses' (full bodies downloaded and stored),
+    'stores' and 'evictions'.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, compress=False, fresh_for=0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.fresh_for = fresh_for
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            url TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, compressed INTEGER NOT NULL,
+            etag TEXT, last_modified TEXT, validated_at REAL NOT NULL, accessed_at REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._db.commit()
+
+    def _path(self, digest, compressed):
+        return os.path.join(self.directory, 'objects', digest[:2], digest[2:] + ('.z' if compressed else ''))
+
+    def lookup(self, url):
+        """
+        Returns the cached entry for a URL as a dict (without the body), or
+        None. 'fresh' tells whether it can be served without revalidation.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, compressed, etag, last_modified, validated_at FROM entries WHERE url = ?",
+                (canonicalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        digest, compressed, etag, last_modified, validated_at = row
+        return {'url': url, 'digest': digest, 'compressed': bool(compressed), 'etag': etag,
+                'last_modified': last_modified, 'fresh': time.time() - validated_at < self.fresh_for}
+
+    def validators(self, entry):
+        """Conditional request headers for a cached entry (empty for None)."""
+        headers = {}
+        if entry and entry['etag']: headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']: headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, entry, revalidated=False):
+        """
+        Returns the cached body of an entry from lookup() and records the hit,
+        or None if the object file has gone missing.
+        """
+        try:
+            with open(self._path(entry['digest'], entry['compressed']), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        with self._lock:
+            self.stats['hits'] += 1
+            if revalidated:
+                self.stats['revalidations'] += 1
+                self._db.execute("UPDATE entries SET validated_at = ?, accessed_at = ? WHERE url = ?",
+                                 (now, now, canonicalize_url(entry['url'])))
+            else:
+                self._db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, canonicalize_url(entry['url'])))
+            self._db.commit()
+        return zlib.decompress(body) if entry['compressed'] else body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Stores a freshly downloaded body and evicts old entries if needed."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest, self.compress)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = zlib.compress(body, 6) if self.compress else body
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT digest, compressed FROM entries WHERE url = ?", (canonicalize_url(url),)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (canonicalize_url(url), digest, size, int(self.compress), etag, last_modified, now, now))
+            self.stats['misses'] += 1
+            self.stats['stores'] += 1
+            if old and old != (digest, int(self.compress)):
+                self._release(*old)
+            self._evict()
+            self._db.commit()
+
+    def _release(self, digest, compressed):
+        # Deletes an object file once no URL refers to it any more; returns whether it did.
+        if self._db.execute("SELECT 1 FROM entries WHERE digest = ? AND compressed = ?", (digest, compressed)).fetchone():
+            return False
+        try:
+            os.remove(self._path(digest, compressed))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict(self):
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            row = self._db.execute("SELECT url, digest, compressed, size FROM entries ORDER BY accessed_at LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (row[0],))
+            if self._release(row[1], row[2]):
+                total -= row[3]
+            self.stats['evictions'] += 1
+
+    def _total_bytes(self):
+        # Shared bodies count once.
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, compressed, size FROM entries)").fetchone()[0]
+
+    def total_bytes(self):
+        """Bytes held by the stored objects."""
+        with self._lock:
+            return self._total_bytes()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -2,27 +2,79 @@
 
 import streamlit as st
 import os
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
 
-# Import logic from other modules
+# Import logic from other modules. Both load their heavy dependencies (openai,
+# trafilatura, textblob/NLTK) on first use, so the page renders right away.
+import credibility_analyzer
+import openai_handler
 from credibility_analyzer import analyze_credibility
-from openai_handler import get_openai_response
+from openai_handler import stream_openai_response
+from response_cache import ResponseCache
+from result_cache import ResultCache
 
 # --- Initialization ---
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize ONLY the OpenAI client
-try:
-    openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    # Test if the key is valid by making a simple call. This prevents errors later.
-    if not openai_client.api_key:
-        raise ValueError("OpenAI API key is missing.")
-except (ValueError, TypeError) as e:
-    st.error(f"OpenAI API key not found or invalid. Please create a `.env` file and add your OPENAI_API_KEY. Error: {e}", icon="🚨")
+# Memoized analysis reports, shared by all sessions: how long one is reused and how many are kept.
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", 3600))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 256))
+
+# Check the key up front without importing the OpenAI SDK; the client is built on first use.
+if not os.getenv("OPENAI_API_KEY"):
+    st.error("OpenAI API key not found or invalid. Please create a `.env` file and add your OPENAI_API_KEY.", icon="🚨")
     st.stop()
 
+def _warm_up():
+    credibility_analyzer.warm_up()
+    openai_handler.preload()
+
+@st.cache_resource
+def start_warm_up():
+    # Runs once per server process: the NLP stack and OpenAI SDK load in the
+    # background while the chat is already usable.
+    thread = threading.Thread(target=_warm_up, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+start_warm_up()
+
+# --- Process-wide resources (built once, shared by every session and rerun) ---
+@st.cache_resource
+def get_openai_client():
+    return openai_handler.create_client(os.getenv("OPENAI_API_KEY"))
+
+@st.cache_resource
+def load_response_cache():
+    # Repeated questions are answered from the response cache (set
+    # CREDIBILITY_RESPONSE_CACHE to a file to keep it across restarts and
+    # CREDIBILITY_RESPONSE_SIMILARITY to e.g. 0.9 to also reuse near-identical questions).
+    similarity = os.getenv("CREDIBILITY_RESPONSE_SIMILARITY")
+    cache = ResponseCache(os.getenv("CREDIBILITY_RESPONSE_CACHE"), similarity_threshold=float(similarity) if similarity else None)
+    openai_handler.set_response_cache(cache)
+    return cache
+
+@st.cache_resource
+def load_analyzer():
+    # The compiled domain index and rule scanner live in the module; the result
+    # cache catches the same article reached through different prompts or URLs
+    # (set CREDIBILITY_RESULT_CACHE to a file to keep it across restarts).
+    credibility_analyzer.set_result_cache(ResultCache(os.getenv("CREDIBILITY_RESULT_CACHE")))
+    return credibility_analyzer
+
+@st.cache_data(ttl=ANALYSIS_CACHE_TTL, max_entries=ANALYSIS_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_analysis(normalized_prompt, _prompt):
+    # Only normalized_prompt is hashed; the analyzer gets the prompt as typed,
+    # since paragraph breaks and character offsets matter to its rules.
+    load_analyzer()
+    return analyze_credibility(_prompt)
+
+def analyze_prompt(prompt):
+    # Reruns and repeated pastes that differ only in whitespace share one cache entry.
+    return cached_analysis(' '.join(prompt.split()), _prompt=prompt)
+
 # --- Streamlit UI ---
 st.set_page_config(page_title="Credibility Analyzer Bot", page_icon="🤖")
 st.title("🤖 Credibility & Conversation Bot")
@@ -45,18 +97,18 @@ if prompt := st.chat_input("URL, text (>50 words for analysis), or a question...
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking... 🤔"):
-            # --- Router Logic ---
-            is_url = prompt.strip().startswith(('http://', 'https://'))
-            is_long_text = len(prompt.strip().split()) > 50
-
-            if is_url or is_long_text:
-                response = analyze_credibility(prompt)
-            else:
-                conversation_history = [msg for msg in st.session_state.messages if msg["role"] in ["user", "assistant"]]
-                response = get_openai_response(conversation_history, openai_client)
-
-        
-        st.markdown(response)
+        # --- Router Logic ---
+        is_url = prompt.strip().startswith(('http://', 'https://'))
+        is_long_text = len(prompt.strip().split()) > 50
+
+        if is_url or is_long_text:
+            with st.spinner("Thinking... 🤔"):
+                response = analyze_prompt(prompt)
+            st.markdown(response)
+        else:
+            load_response_cache()
+            conversation_history = [msg for msg in st.session_state.messages if msg["role"] in ["user", "assistant"]]
+            # Tokens are written into the bubble as they arrive instead of behind a spinner.
+            response = st.write_stream(stream_openai_response(conversation_history, get_openai_client()))
 
     st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
@@ -0,0 +1,297 @@
+# metrics.py
+
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Counters and histograms are registered once at import time by the modules
+they measure, optionally with label names:
+
+    STAGE_SECONDS = histogram('credibility_stage_seconds', "Seconds per analysis stage.", ['stage'])
+
+    with STAGE_SECONDS.time('fetch'):
+        ...
+
+Collection is off unless the CREDIBILITY_METRICS environment variable is
+set or enable() is called. While off, inc(), observe() and time() return
+straight away (time() hands out one shared no-op context manager), so the
+instrumented code pays one attribute check per call. snapshot() returns the
+values as a dict, render_prometheus() as Prometheus text, and
+start_http_server() serves them on /metrics. Processes serving one
+endpoint together (e.g. forked workers) exchange export_state() and
+render the sum with render_prometheus(states).
+"""
+
+import copy
+import os
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_REGISTRY = {}
+_lock = threading.Lock()
+
+
+class _State:
+    enabled = bool(os.getenv("CREDIBILITY_METRICS"))
+
+
+def enable(enabled=True):
+    """Turns collection on or off for the whole process."""
+    _State.enabled = enabled
+
+
+def is_enabled():
+    return _State.enabled
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        if _State.enabled:
+            with _lock:
+                self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        if _State.enabled:
+            i = bisect_left(self.buckets, value)
+            with _lock:
+                self.counts[i] += 1
+                self.sum += value
+                self.count += 1
+
+    def time(self):
+        return _Timer(self) if _State.enabled else _NULL_TIMER
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        """The series for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with _lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, *label_values, amount=1):
+        if _State.enabled:
+            self.labels(*label_values).inc(amount)
+
+    def _samples(self):
+        for values, child in sorted(self._children.items()):
+            yield f"{self.name}{self._label_text(values)} {child.value}"
+
+    def _snapshot(self):
+        return {values: child.value for values, child in self._children.items()}
+
+    def _state(self, child):
+        return child.value
+
+    def _merge(self, child, state):
+        child.value += state
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, *label_values):
+        if _State.enabled:
+            self.labels(*label_values).observe(value)
+
+    def time(self, *label_values):
+        """Context manager that observes the seconds its block took."""
+        if not _State.enabled:
+            return _NULL_TIMER
+        return _Timer(self.labels(*label_values))
+
+    def _samples(self):
+        for values, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f"{self.name}_bucket{self._label_text(values, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(values)} {child.sum}"
+            yield f"{self.name}_count{self._label_text(values)} {child.count}"
+
+    def _snapshot(self):
+        return {values: {'count': child.count, 'sum': child.sum,
+                         'buckets': dict(zip(self.buckets + (float('inf'),), child.counts))}
+                for values, child in self._children.items()}
+
+    def _state(self, child):
+        return [child.counts, child.sum, child.count]
+
+    def _merge(self, child, state):
+        counts, total, count = state
+        child.counts = [a + b for a, b in zip(child.counts, counts)]
+        child.sum += total
+        child.count += count
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _register(metric):
+    with _lock:
+        existing = _REGISTRY.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered differently.")
+            return existing
+        _REGISTRY[metric.name] = metric
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """Registers (or returns the already registered) counter."""
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    """Registers (or returns the already registered) histogram."""
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def snapshot():
+    """
+    Current values as {metric name: {label values tuple: value}}; a
+    histogram's value is a dict with 'count', 'sum' and per-bucket counts.
+    """
+    with _lock:
+        return {name: metric._snapshot() for name, metric in _REGISTRY.items()}
+
+
+def export_state():
+    """Current values in a JSON-serializable form, for render_prometheus(states)."""
+    with _lock:
+        return {name: [[list(values), metric._state(child)] for values, child in metric._children.items()]
+                for name, metric in _REGISTRY.items()}
+
+
+def _summed(metric, states):
+    # An unregistered copy of a metric holding the sum of its values in every state.
+    total = copy.copy(metric)
+    total._children = {}
+    for state in states:
+        for values, value in state.get(metric.name, ()):
+            values = tuple(values)
+            child = total._children.get(values)
+            if child is None:
+                child = total._children[values] = total._new_child()
+            total._merge(child, value)
+    return total
+
+
+def render_prometheus(states=None):
+    """
+    All metrics in the Prometheus text exposition format (version 0.0.4).
+    With states, a list of export_state() results, renders their sum instead
+    of this process's values.
+    """
+    lines = []
+    with _lock:
+        for name, metric in sorted(_REGISTRY.items()):
+            if states is not None:
+                metric = _summed(metric, states)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric._samples())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Drops every recorded value (registrations stay)."""
+    with _lock:
+        for metric in _REGISTRY.values():
+            metric._children.clear()
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serves /metrics for Prometheus from a daemon thread; returns the server."""
+    # Imported here: http.server is slow to import and most processes never serve metrics.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404); return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,215 @@
+# near_duplicates.py
+
+"""
+MinHash/LSH index of scored article texts for finding near-duplicates.
+
+Wire stories reappear almost verbatim on many sites. Each text is reduced
+to a MinHash signature of its lowercased word shingles (num_perm 32-bit
+minimums), and the signature is split into bands that are hashed into
+buckets: texts sharing any band bucket are candidates, and a candidate
+whose signatures agree on at least `threshold` of the positions (an
+estimate of the shingles' Jaccard similarity) is a match. Lookups cost one
+signature plus a few dict probes however many texts are indexed.
+
+Each entry carries a JSON payload, here the text-derived scores the
+analyzer reuses, and optionally a version: lookups for a version skip
+entries made under another one. The index keeps at most max_entries texts
+(oldest go first); with a path the entries live in SQLite and are
+reloaded on start.
+
+    index = NearDuplicateIndex('near_duplicates.sqlite', threshold=0.8)
+    credibility_analyzer.set_near_duplicate_index(index)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+_PRIME = (1 << 61) - 1
+# Shingles hashed per block, so long pages need block x num_perm words of scratch memory at most.
+_BLOCK = 2048
+
+
+def _shingle_hashes(text, shingle_words):
+    # 32-bit hashes of the text's overlapping word n-grams, combined from per-word CRC32s.
+    words = text.lower().split()
+    if not words:
+        return None
+    k = min(shingle_words, len(words))
+    word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8', 'surrogatepass')) for word in words),
+                              dtype=np.uint64, count=len(words))
+    shingles = np.zeros(len(words) - k + 1, dtype=np.uint64)
+    for offset in range(k):
+        shingles = (shingles * np.uint64(1_000_003) + word_hashes[offset:len(words) - k + 1 + offset]) & np.uint64(0xFFFFFFFF)
+    return np.unique(shingles)
+
+
+class NearDuplicateIndex:
+    """
+    Near-duplicate lookups over article texts; path=None keeps the index in
+    memory only. num_perm must be a multiple of bands.
+    """
+
+    def __init__(self, path=None, threshold=0.8, num_perm=128, bands=32, shingle_words=5,
+                 max_entries=100_000, seed=676):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_words = shingle_words
+        self.max_entries = max_entries
+        self.stats = {'matches': 0, 'misses': 0, 'evictions': 0}
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, num_perm).astype(np.uint64)
+        self._rows = num_perm // bands
+        # entry id -> signature and version; payloads are kept here too without a database.
+        self._signatures = OrderedDict()
+        self._versions = {}
+        self._payloads = {}
+        self._buckets = [{} for _ in range(bands)]
+        # Ids of an in-memory index; with a database SQLite assigns them, so processes sharing it never collide.
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.path = path
+        self._db = None
+        self._pid = None
+        if path:
+            db = self._connection()
+            db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY, signature BLOB NOT NULL, payload TEXT NOT NULL, added_at REAL NOT NULL,
+                version TEXT)""")
+            # Files written before entries had versions; their entries match no version.
+            if 'version' not in {column[1] for column in db.execute("PRAGMA table_info(entries)")}:
+                db.execute("ALTER TABLE entries ADD COLUMN version TEXT")
+            db.commit()
+            rows = db.execute("SELECT id, signature, version FROM entries ORDER BY id DESC LIMIT ?", (max_entries,)).fetchall()
+            for entry_id, blob, version in reversed(rows):
+                signature = np.frombuffer(blob, dtype=np.uint32)
+                if len(signature) == num_perm:
+                    self._insert(entry_id, signature, version)
+            if rows:
+                # Rows beyond a since lowered max_entries.
+                db.execute("DELETE FROM entries WHERE id < ?", (rows[-1][0],))
+                db.commit()
+
+    def _connection(self):
+        # SQLite connections must not cross a fork, so a forked worker (batch_analyzer's
+        # pool, the scoring service's workers) opens its own on first use.
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._db
+
+    def signature(self, text):
+        """MinHash signature (uint32 array of num_perm values) of a text, or None if it has no words."""
+        shingles = _shingle_hashes(text, self.shingle_words)
+        if shingles is None:
+            return None
+        minimums = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(shingles), _BLOCK):
+            hashed = (shingles[start:start + _BLOCK, None] * self._a + self._b) % np.uint64(_PRIME)
+            np.minimum(minimums, hashed.min(axis=0), out=minimums)
+        return (minimums & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    @staticmethod
+    def similarity(a, b):
+        """Estimated Jaccard similarity of the texts behind two signatures."""
+        return float(np.count_nonzero(a == b)) / len(a)
+
+    def _band_keys(self, signature):
+        return [signature[i * self._rows:(i + 1) * self._rows].tobytes() for i in range(self.bands)]
+
+    def lookup(self, text, signature=None, version=None):
+        """
+        Returns (payload, similarity) of the most similar indexed text at or
+        above the threshold, or None. With a version, only entries added
+        under that version are considered.
+        """
+        signature = self.signature(text) if signature is None else signature
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(key, ()))
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                if version is not None and self._versions[entry_id] != version:
+                    continue
+                similarity = self.similarity(signature, self._signatures[entry_id])
+                if similarity >= best_similarity:
+                    best, best_similarity = entry_id, similarity
+            if best is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['matches'] += 1
+            if self.path is None:
+                return self._payloads[best], best_similarity
+            row = self._connection().execute("SELECT payload FROM entries WHERE id = ?", (best,)).fetchone()
+            # Another process sharing the file may have evicted it since.
+            return (json.loads(row[0]), best_similarity) if row else None
+
+    def add(self, text, payload, signature=None, version=None):
+        """
+        Indexes a text with a JSON-serializable payload under an optional
+        version string; returns its entry id (None for an empty text).
+        """
+        signature = self.signature(text) if signature is None else signature
+        if signature is None:
+            return None
+        with self._lock:
+            if self.path is None:
+                entry_id = self._next_id
+                self._next_id += 1
+                self._payloads[entry_id] = payload
+                for old in self._insert(entry_id, signature, version):
+                    del self._payloads[old]
+                return entry_id
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                entry_id = db.execute("INSERT INTO entries (signature, payload, added_at, version) VALUES (?, ?, ?, ?)",
+                                      (signature.tobytes(), json.dumps(payload), time.time(), version)).lastrowid
+                evicted = self._insert(entry_id, signature, version)
+                db.executemany("DELETE FROM entries WHERE id = ?", [(old,) for old in evicted])
+            except BaseException:
+                db.rollback()
+                raise
+            db.commit()
+            return entry_id
+
+    def _insert(self, entry_id, signature, version):
+        self._signatures[entry_id] = signature
+        self._versions[entry_id] = version
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, set()).add(entry_id)
+        evicted = []
+        while len(self._signatures) > self.max_entries:
+            old, old_signature = self._signatures.popitem(last=False)
+            del self._versions[old]
+            for buckets, key in zip(self._buckets, self._band_keys(old_signature)):
+                bucket = buckets[key]
+                bucket.discard(old)
+                if not bucket:
+                    del buckets[key]
+            evicted.append(old)
+            self.stats['evictions'] += 1
+        return evicted
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
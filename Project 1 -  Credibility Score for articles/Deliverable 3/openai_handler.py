@@ -1,16 +1,319 @@
 # openai_handler.py
 
-from openai import OpenAI
+import math
+import os
+import re
+import time
 
-def get_openai_response(messages, openai_client):
+import metrics
+
+# The OpenAI SDK takes most of a second to import, so it is only imported
+# when a client is created (see create_client and preload).
+
+# Model routing: short, simple questions go to the fast model and everything
+# else to the strong one. If a model times out or the API fails, the other one
+# answers. A streamed reply must start within latency_slo seconds; a reply
+# fetched in one piece (get_openai_response) within request_timeout seconds.
+ROUTING = {
+    'fast_model': "gpt-4o-mini",
+    'strong_model': "gpt-4o",
+    'fast_max_tokens': 40,
+    'complex_cues': r"\b(explain|why|how (do|does|did|can|could|would)|compare|difference|analy[sz]e|evaluate|"
+                    r"assess|summari[sz]e|pros and cons|step by step|in detail|write|code|prove|calculate)\b|```",
+    'latency_slo': float(os.getenv("CREDIBILITY_CHAT_SLO", 10.0)),
+    'request_timeout': float(os.getenv("CREDIBILITY_CHAT_TIMEOUT", 60.0)),
+}
+
+# Prompt size sent per request; older turns are compacted and then dropped to stay under it.
+HISTORY_TOKEN_BUDGET = int(os.getenv("CREDIBILITY_HISTORY_TOKENS", 3000))
+# The latest messages are sent verbatim so follow-up questions can refer to the last report.
+KEEP_RECENT_MESSAGES = 2
+# OpenAI counts a few tokens of framing per message on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+# User messages longer than this were pasted articles (main.py routes them to the analyzer).
+ARTICLE_WORDS = 50
+
+RESPONSE_SECONDS = metrics.histogram(
+    'openai_response_seconds', "Seconds until the first token and until the whole reply arrived.", ['model', 'phase'])
+ROUTED = metrics.counter('openai_routed_requests_total', "Chat requests by chosen model and reason.", ['model', 'reason'])
+FALLBACKS = metrics.counter('openai_fallbacks_total', "Failed attempts that were retried on the other model.", ['model', 'error'])
+USAGE_TOKENS = metrics.counter('openai_usage_tokens_total', "Prompt and completion tokens reported by the API.", ['model', 'kind'])
+PROMPT_TOKENS = metrics.histogram(
+    'openai_prompt_tokens', "Estimated prompt tokens per request after history trimming.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000))
+
+def create_client(api_key=None, base_url=None):
+    """
+    Builds the OpenAI client used by get_openai_response. base_url points it
+    at another OpenAI-compatible server, e.g. a local stand-in in the tests.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+def preload():
+    """
+    Imports the OpenAI SDK ahead of the first conversation, e.g. from a background thread.
+    """
+    import openai  # noqa: F401
+
+_encoding = None
+
+def _get_encoding():
+    # tiktoken is optional; without it (or without its cached BPE files) tokens are estimated.
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+def count_tokens(text):
+    """
+    Tokens in text for gpt-4o: exact with tiktoken installed, otherwise about
+    one token per four characters (rounded up, at least one per word).
+    """
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(math.ceil(len(text) / 4), len(text.split()))
+
+def count_message_tokens(messages):
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+_FINAL_SCORE_RE = re.compile(r"Final Credibility Score: `([\d.]+) / 100\.00`")
+_PART_SCORE_RE = re.compile(r"\*\*Score:\*\* `([\d.]+)`")
+
+def compact_message(message):
+    """
+    Returns a short stand-in for a bulky message: a credibility report
+    becomes its scores and a pasted article its opening words. Other
+    messages are returned unchanged.
+    """
+    content = message["content"]
+    final = _FINAL_SCORE_RE.search(content) if message["role"] == "assistant" else None
+    if final:
+        parts = _PART_SCORE_RE.findall(content)
+        breakdown = f" (rule-based {parts[0]}, linguistic {parts[1]})" if len(parts) == 2 else ""
+        return {"role": "assistant", "content": f"[Credibility analysis report: final score {final.group(1)} / 100{breakdown}.]"}
+    words = content.split()
+    if message["role"] == "user" and len(words) > ARTICLE_WORDS:
+        return {"role": "user", "content": f"[Pasted article of {len(words)} words for credibility analysis, "
+                                           f"beginning: {' '.join(words[:25])} ...]"}
+    return message
+
+def _drop_oldest(messages, keep, token_budget, stop):
+    # Drops the oldest kept non-system messages before index stop until the
+    # kept ones fit; returns their token total.
+    tokens = [count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages]
+    total = sum(n for n, kept in zip(tokens, keep) if kept)
+    for i, message in enumerate(messages[:stop]):
+        if total <= token_budget:
+            break
+        if keep[i] and message["role"] != "system":
+            keep[i] = False
+            total -= tokens[i]
+    return total
+
+def trim_history(messages, token_budget=None):
+    """
+    Fits a conversation into token_budget (default HISTORY_TOKEN_BUDGET).
+    Reports and pasted articles outside the last KEEP_RECENT_MESSAGES are
+    compacted first and the oldest messages dropped; if that is not enough
+    the recent messages are compacted as well and dropped oldest first.
+    System messages and the latest message are always kept.
+    """
+    token_budget = HISTORY_TOKEN_BUDGET if token_budget is None else token_budget
+    cutoff = len(messages) - KEEP_RECENT_MESSAGES
+    trimmed = [message if i >= cutoff else compact_message(message) for i, message in enumerate(messages)]
+    keep = [True] * len(trimmed)
+    if _drop_oldest(trimmed, keep, token_budget, max(cutoff, 0)) > token_budget:
+        # Even the recent messages are too long: compact those as well and
+        # count again, dropping them too if the summaries still do not fit.
+        trimmed = [compact_message(message) if message["role"] != "system" else message for message in trimmed]
+        _drop_oldest(trimmed, keep, token_budget, len(trimmed) - 1)
+    return [message for message, kept in zip(trimmed, keep) if kept]
+
+# Optional response_cache.ResponseCache consulted before calling the API, see set_response_cache().
+_response_cache = None
+
+def set_response_cache(cache):
+    """Enables (or with None disables) caching of replies by conversation."""
+    global _response_cache
+    _response_cache = cache
+
+def _prepare(messages, token_budget):
+    messages = trim_history(messages, token_budget)
+    PROMPT_TOKENS.observe(count_message_tokens(messages))
+    return messages
+
+_complex_re = None
+
+def route_model(messages):
+    """
+    Returns (model, reason) for a conversation: the strong model when the
+    latest question is long ('long'), asks for reasoning or writing
+    ('complex') or follows a credibility report still in the recent history
+    ('report'); the fast model otherwise ('simple').
+    """
+    global _complex_re
+    if _complex_re is None:
+        _complex_re = re.compile(ROUTING['complex_cues'], re.IGNORECASE)
+    question = messages[-1]["content"] if messages else ""
+    if count_tokens(question) > ROUTING['fast_max_tokens']:
+        return ROUTING['strong_model'], 'long'
+    if _complex_re.search(question):
+        return ROUTING['strong_model'], 'complex'
+    if any(_FINAL_SCORE_RE.search(m["content"]) for m in messages[-KEEP_RECENT_MESSAGES - 1:-1]):
+        return ROUTING['strong_model'], 'report'
+    return ROUTING['fast_model'], 'simple'
+
+def _attempts(openai_client, model, timeout):
+    """
+    The (model, client) pairs to try in turn. Attempts run with the given
+    timeout and without the SDK's own retries: the other model is the retry.
+    """
+    other = {ROUTING['fast_model']: ROUTING['strong_model'], ROUTING['strong_model']: ROUTING['fast_model']}.get(model)
+    client = openai_client.with_options(timeout=timeout, max_retries=0)
+    return [(model, client)] + ([(other, client)] if other else [])
+
+def _fallback_errors():
+    # Errors another model may not hit; bad requests and auth failures are raised as they are.
+    import openai
+    return (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+def _record_usage(model, usage):
+    if usage is not None:
+        USAGE_TOKENS.inc(model, 'prompt', amount=usage.prompt_tokens)
+        USAGE_TOKENS.inc(model, 'completion', amount=usage.completion_tokens)
+
+def _route(messages, model):
+    model, reason = (model, 'fixed') if model else route_model(messages)
+    ROUTED.inc(model, reason)
+    return model
+
+def get_openai_response(messages, openai_client, model=None, token_budget=None, timings=None):
     """
     Handles conversational queries using the OpenAI model's internal knowledge.
+    The history is trimmed to token_budget first (see trim_history), and a
+    reply from the response cache is returned without calling the API.
+    Without an explicit model the request is routed (see route_model).
+    A dict passed as timings receives the 'model' that answered and 'total'.
     """
-    # Make a simple API call without any tools
-    response = openai_client.chat.completions.create(
-        model="gpt-4o",
-        messages=messages
-    )
-    
+    start = time.perf_counter()
+    messages = _prepare(messages, token_budget)
+    model = _route(messages, model)
+    if _response_cache is not None:
+        cached = _response_cache.get(messages, model)
+        if cached is not None:
+            if timings is not None:
+                timings.update(model=None, total=time.perf_counter() - start)
+            return cached
+    # The whole reply arrives at once, so the timeout covers generating all of it.
+    attempts = _attempts(openai_client, model, ROUTING['request_timeout'])
+    for i, (current, client) in enumerate(attempts):
+        attempt_start = time.perf_counter()
+        try:
+            # Make a simple API call without any tools
+            response = client.chat.completions.create(
+                model=current,
+                messages=messages
+            )
+        except _fallback_errors() as error:
+            FALLBACKS.inc(current, type(error).__name__)
+            if i == len(attempts) - 1:
+                raise
+            continue
+        break
+    RESPONSE_SECONDS.observe(time.perf_counter() - attempt_start, current, 'total')
+    _record_usage(current, response.usage)
+    if timings is not None:
+        timings.update(model=current, total=time.perf_counter() - start)
+
     # Return the text content of the response
-    return response.choices[0].message.content
\ No newline at end of file
+    reply = response.choices[0].message.content
+    if _response_cache is not None and reply:
+        _response_cache.put(messages, reply, model)
+    return reply
+
+def _stream_pieces(stream, usage):
+    for chunk in stream:
+        # The last chunk carries only the usage and no choices.
+        if chunk.usage is not None:
+            usage.append(chunk.usage)
+        content = chunk.choices[0].delta.content if chunk.choices else None
+        if content:
+            yield content
+
+def stream_openai_response(messages, openai_client, model=None, timings=None, token_budget=None):
+    """
+    Same as get_openai_response but yields the reply in pieces as the model
+    produces them, so the UI can show the first words straight away. A cached
+    reply is yielded in one piece; a streamed reply is cached once complete.
+    The fallback to the other model only happens before the first token.
+
+    Time to first token and total latency per model go to the
+    openai_response_seconds histogram and, when a dict is passed as timings,
+    into its 'first_token' and 'total' keys (measured from the call, so they
+    include a failed attempt; first_token stays None if no text arrived)
+    together with the 'model' that answered (None for a cache hit).
+    """
+    start = time.perf_counter()
+    if timings is not None:
+        timings.update(model=None, first_token=None, total=None)
+    messages = _prepare(messages, token_budget)
+    model = _route(messages, model)
+    if _response_cache is not None:
+        cached = _response_cache.get(messages, model)
+        if cached is not None:
+            if timings is not None:
+                timings['first_token'] = timings['total'] = time.perf_counter() - start
+            yield cached
+            return
+    # The SDK's read timeout applies per chunk, so the SLO bounds the wait for each token, the first included.
+    attempts = _attempts(openai_client, model, ROUTING['latency_slo'])
+    usage = []
+    for i, (current, client) in enumerate(attempts):
+        attempt_start = time.perf_counter()
+        stream = None
+        try:
+            stream = client.chat.completions.create(
+                model=current,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            pieces = _stream_pieces(stream, usage)
+            first = next(pieces, None)
+        except _fallback_errors() as error:
+            FALLBACKS.inc(current, type(error).__name__)
+            if stream is not None:
+                stream.close()
+            if i == len(attempts) - 1:
+                raise
+            continue
+        break
+    if timings is not None:
+        timings['model'] = current
+    collected = []
+    try:
+        if first is not None:
+            RESPONSE_SECONDS.observe(time.perf_counter() - attempt_start, current, 'first_token')
+            if timings is not None:
+                timings['first_token'] = time.perf_counter() - start
+            collected.append(first)
+            yield first
+        for content in pieces:
+            collected.append(content)
+            yield content
+        # Only replies that arrived in full are cached.
+        if _response_cache is not None and collected:
+            _response_cache.put(messages, ''.join(collected), model)
+    finally:
+        # Also runs when the consumer stops early, e.g. the Streamlit session reran.
+        stream.close()
+        RESPONSE_SECONDS.observe(time.perf_counter() - attempt_start, current, 'total')
+        _record_usage(current, usage[0] if usage else None)
+        if timings is not None:
+            timings['total'] = time.perf_counter() - start
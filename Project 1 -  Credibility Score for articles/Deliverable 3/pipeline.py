@@ -0,0 +1,226 @@
+# pipeline.py
+
+"""
+Staged streaming scorer for bulk jobs: JSONL records in, JSONL results out.
+
+Records flow through three thread-pool stages joined by bounded queues:
+
+    read -> [fetch] -> fetch workers -> [extract] -> extract workers -> [score] -> score workers -> [output] -> write
+
+A full queue blocks the stage feeding it, so at most a few queues' worth of
+records is in memory however long the input is. Results are written as they
+complete, so their order differs from the input; each carries the input's
+'index' (and 'id' if the record had one). Queue depths and per-stage busy
+time show which stage is the bottleneck: a full queue in front of a stage
+whose workers are always busy.
+
+Input lines are JSON objects with a 'url' or 'text' key (and optionally
+'id'), JSON strings, or a bare URL or text per line:
+
+    python pipeline.py urls.jsonl -o results.jsonl --fetch-workers 32 --report-every 5
+
+An output path ending in .parquet is written with result_export instead.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+import credibility_analyzer
+import fetcher
+
+_DONE = object()
+STAGES = ('fetch', 'extract', 'score')
+
+
+def parse_record(line):
+    """
+    Turns an input line into (id, input). Raises ValueError for malformed
+    JSON or objects without 'url' or 'text'.
+    """
+    line = line.strip()
+    if not line.startswith(('{', '"')):
+        return None, line
+    record = json.loads(line)
+    if isinstance(record, str):
+        return None, record
+    if not isinstance(record, dict) or not isinstance(record.get('url') or record.get('text'), str):
+        raise ValueError("record needs a 'url' or 'text' string")
+    return record.get('id'), record.get('url') or record['text']
+
+
+class Pipeline:
+    """
+    Bounded three-stage pipeline over credibility_analyzer.
+
+    Each stage runs its own number of worker threads; every queue holds at
+    most queue_size items. Scoring is CPU-bound and shares the GIL, so more
+    score workers only help while fetching or the result cache overlap with
+    it; use batch_analyzer for multi-core scoring.
+    """
+
+    def __init__(self, fetch_workers=16, extract_workers=2, score_workers=1, queue_size=64):
+        self.workers = {'fetch': fetch_workers, 'extract': extract_workers, 'score': score_workers}
+        self.queue_size = queue_size
+        self.queues = {name: queue.Queue(queue_size) for name in STAGES + ('output',)}
+        self.stats = {name: {'processed': 0, 'busy_seconds': 0.0} for name in STAGES}
+        self._lock = threading.Lock()
+        self._running = {}
+        self._started_at = None
+
+    def queue_depths(self):
+        """Current number of items waiting in front of each stage and the writer."""
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def report(self):
+        """One-line status: queue depths and each stage's busy fraction since start."""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9) if self._started_at else 1e-9
+        depths = ' '.join(f"{name}={depth}/{self.queue_size}" for name, depth in self.queue_depths().items())
+        busy = ' '.join(f"{name}={self.stats[name]['busy_seconds'] / (elapsed * self.workers[name]):.0%}"
+                        for name in STAGES)
+        return f"queues {depths} | busy {busy} | scored {self.stats['score']['processed']}"
+
+    # --- Stages ---
+
+    def _fetch(self, item):
+        if item['input'].startswith(('http://', 'https://')):
+            with credibility_analyzer.STAGE_SECONDS.time('fetch'):
+                item['downloaded'] = fetcher.fetch_url(item['input'])
+        return item
+
+    def _extract(self, item):
+        result = item['result']
+        if not item['input'].startswith(('http://', 'https://')):
+            item['text'] = item['input']
+        elif item['downloaded']:
+            article = credibility_analyzer.get_article_from_url(item['input'], item.pop('downloaded')) or {}
+            item['text'] = article.pop('text', None)
+            result.update(url=item['input'], title=article.pop('title', None), metadata=article)
+            if not item['text']: result['error'] = 'fetch_failed'
+        else:
+            result['url'] = item['input']
+            result['error'] = 'fetch_failed'
+        return item
+
+    def _score(self, item):
+        credibility_analyzer.score_content(item['result'], item['text'])
+        return item
+
+    def _worker(self, name, handler, downstream):
+        inbox, outbox = self.queues[name], self.queues[downstream]
+        stats = self.stats[name]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            if item['result']['error'] is None:
+                start = time.monotonic()
+                try:
+                    item = handler(item)
+                except Exception as e:
+                    item['result'].update(error='internal_error', error_detail=f"{type(e).__name__}: {e}")
+                with self._lock:
+                    stats['processed'] += 1
+                    stats['busy_seconds'] += time.monotonic() - start
+            # Failed items skip the remaining stages but keep their place in the queues.
+            outbox.put(item)
+        with self._lock:
+            self._running[name] -= 1
+            last = self._running[name] == 0
+        if last:
+            for _ in range(self.workers.get(downstream, 1)):
+                outbox.put(_DONE)
+
+    def _read(self, lines):
+        fetch_queue = self.queues['fetch']
+        try:
+            for index, line in enumerate(lines):
+                if not line.strip():
+                    continue
+                try:
+                    record_id, user_input = parse_record(line)
+                    result = credibility_analyzer.new_result(user_input)
+                except ValueError as e:
+                    result = credibility_analyzer.new_result(line.strip())
+                    result.update(error='invalid_record', error_detail=str(e))
+                    record_id, user_input = None, ''
+                result['index'] = index
+                if record_id is not None:
+                    result['id'] = record_id
+                fetch_queue.put({'input': user_input, 'result': result})
+        finally:
+            for _ in range(self.workers['fetch']):
+                fetch_queue.put(_DONE)
+
+    def run(self, lines):
+        """
+        Streams an iterable of input lines through the stages and yields
+        result dicts (as credibility_analyzer.analyze returns them) in
+        completion order.
+        """
+        self._started_at = time.monotonic()
+        self._running = dict(self.workers)
+        threads = [threading.Thread(target=self._read, args=(lines,), name='pipeline-read', daemon=True)]
+        handlers = {'fetch': self._fetch, 'extract': self._extract, 'score': self._score}
+        for position, name in enumerate(STAGES):
+            downstream = (STAGES + ('output',))[position + 1]
+            threads += [threading.Thread(target=self._worker, args=(name, handlers[name], downstream),
+                                         name=f"pipeline-{name}-{i}", daemon=True)
+                        for i in range(self.workers[name])]
+        for thread in threads:
+            thread.start()
+        output = self.queues['output']
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            if item['result']['error'] not in (None, 'too_short'):
+                credibility_analyzer.ERRORS.inc(item['result']['error'])
+            yield item['result']
+        for thread in threads:
+            thread.join()
+
+
+def _reporter(pipeline, interval, stop):
+    while not stop.wait(interval):
+        print(pipeline.report(), file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score URLs or article texts from JSONL, streaming JSONL results.")
+    parser.add_argument('input', nargs='?', default='-', help="Input file, '-' for stdin (default).")
+    parser.add_argument('-o', '--output', default='-', help="Output file, '-' for stdout (default); *.parquet writes Parquet.")
+    parser.add_argument('--fetch-workers', type=int, default=16)
+    parser.add_argument('--extract-workers', type=int, default=2)
+    parser.add_argument('--score-workers', type=int, default=1)
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--report-every', type=float, default=0, help="Seconds between queue depth reports on stderr.")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(args.fetch_workers, args.extract_workers, args.score_workers, args.queue_size)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    if args.output.endswith('.parquet'):
+        from result_export import ParquetResultWriter
+        sink = ParquetResultWriter(args.output)
+        write = sink.write
+    else:
+        sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        write = lambda result: sink.write(json.dumps(result, ensure_ascii=False) + '\n')
+    stop = threading.Event()
+    if args.report_every > 0:
+        threading.Thread(target=_reporter, args=(pipeline, args.report_every, stop), daemon=True).start()
+    try:
+        for result in pipeline.run(source):
+            write(result)
+    finally:
+        stop.set()
+        if source is not sys.stdin: source.close()
+        if sink is not sys.stdout: sink.close()
+    print(pipeline.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# response_cache.py
+
+"""
+Cache of chat replies so repeated questions skip the OpenAI round trip.
+
+Two tiers, both keyed per model:
+
+* exact: a hash of the whole conversation with case and runs of whitespace
+  normalized away;
+* similarity (optional): the last user message is turned into a hashed
+  bag of words and word pairs, and a cached reply is reused when an earlier
+  question asked after the same preceding conversation has a cosine
+  similarity of at least similarity_threshold. No embedding service is
+  involved; the vectors are computed locally in microseconds.
+
+Entries expire ttl seconds after they were stored and at most max_entries
+are kept (least recently used go first). With a path the entries are also
+kept in SQLite and reloaded on start, so the cache survives restarts.
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import metrics
+
+LOOKUPS = metrics.counter('openai_cache_lookups_total', "Response cache lookups by outcome.", ['outcome'])
+
+VECTOR_DIMENSIONS = 1 << 18
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def conversation_key(messages, model=''):
+    """Hash of the model and the normalized (role, content) pairs."""
+    digest = hashlib.sha256(model.encode('utf-8'))
+    for message in messages:
+        digest.update(b'\0' + message['role'].encode('utf-8') + b'\0')
+        digest.update(_normalize(message['content']).encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def text_vector(text):
+    """
+    Unit-length sparse vector {index: weight} of the words and adjacent word
+    pairs in text, hashed into VECTOR_DIMENSIONS buckets with CRC32 (which,
+    unlike hash(), is the same in every process).
+    """
+    words = _WORD_RE.findall(text.lower())
+    counts = {}
+    for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        index = zlib.crc32(term.encode('utf-8')) & (VECTOR_DIMENSIONS - 1)
+        counts[index] = counts.get(index, 0) + 1
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return {index: c / norm for index, c in counts.items()} if norm else {}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+class ResponseCache:
+    """
+    Exact and (when similarity_threshold is set) similarity lookups of chat
+    replies; path=None keeps the cache in memory only.
+    """
+
+    def __init__(self, path=None, ttl=24 * 3600, max_entries=10_000, similarity_threshold=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.stats = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'evictions': 0}
+        # key -> (expires_at, reply, context key, question vector)
+        self._entries = OrderedDict()
+        # context key -> keys of the entries asked after that context
+        self._by_context = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, context TEXT NOT NULL, question TEXT NOT NULL, reply TEXT NOT NULL,
+                expires_at REAL NOT NULL, accessed_at REAL NOT NULL)""")
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            rows = self._db.execute("SELECT key, context, question, reply, expires_at FROM responses "
+                                    "ORDER BY accessed_at DESC LIMIT ?", (max_entries,)).fetchall()
+            for key, context, question, reply, expires_at in reversed(rows):
+                self._remember(key, expires_at, json.loads(reply), context, question)
+
+    @staticmethod
+    def _split(messages, model):
+        # The similarity tier compares the last user message given everything before it.
+        return conversation_key(messages[:-1], model), messages[-1]['content']
+
+    def get(self, messages, model=''):
+        """Returns the cached reply for a conversation, or None."""
+        key = conversation_key(messages, model)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return self._hit(key, entry, 'exact', now)
+            if self.similarity_threshold is not None and messages and messages[-1]['role'] == 'user':
+                context, question = self._split(messages, model)
+                vector = text_vector(question)
+                best, best_score = None, self.similarity_threshold
+                for candidate in self._by_context.get(context, ()):
+                    expires_at, _, _, candidate_vector = self._entries[candidate]
+                    score = cosine(vector, candidate_vector)
+                    if expires_at > now and score >= best_score:
+                        best, best_score = candidate, score
+                if best is not None:
+                    return self._hit(best, self._entries[best], 'similar', now)
+            self.stats['misses'] += 1
+            LOOKUPS.inc('miss')
+            return None
+
+    def _hit(self, key, entry, outcome, now):
+        self._entries.move_to_end(key)
+        self.stats[f'{outcome}_hits'] += 1
+        LOOKUPS.inc(outcome)
+        if self._db is not None:
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return entry[1]
+
+    def put(self, messages, reply, model=''):
+        """Stores the reply to a conversation."""
+        key = conversation_key(messages, model)
+        context, question = self._split(messages, model) if messages else ('', '')
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            evicted = self._remember(key, expires_at, reply, context, question)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, context, question, json.dumps(reply), expires_at, now))
+                self._db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in evicted])
+                self._db.commit()
+
+    def _remember(self, key, expires_at, reply, context, question):
+        if key in self._entries:
+            self._forget(key)
+        self._entries[key] = (expires_at, reply, context, text_vector(question))
+        self._by_context.setdefault(context, {})[key] = None
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._forget(oldest)
+            evicted.append(oldest)
+            self.stats['evictions'] += 1
+        return evicted
+
+    def _forget(self, key):
+        context = self._entries.pop(key)[2]
+        keys = self._by_context[context]
+        del keys[key]
+        if not keys:
+            del self._by_context[context]
+
+    def hit_rate(self):
+        """Share of lookups answered from the cache (either tier)."""
+        hits = self.stats['exact_hits'] + self.stats['similar_hits']
+        lookups = hits + self.stats['misses']
+        return hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
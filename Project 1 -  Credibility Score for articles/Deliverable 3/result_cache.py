@@ -0,0 +1,141 @@
+# result_cache.py
+
+"""
+Two-tier cache of scoring results keyed by article content.
+
+The key is a hash of the whitespace-normalized text, the title, the domain
+and a CONFIG version, so the same article pasted twice or reposted on the
+same site is scored once. Lookups try an in-process LRU first and then an
+optional SQLite file that survives restarts and can be shared by processes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def config_version(config):
+    """Short fingerprint of a configuration dict; changes whenever any setting does."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def result_key(text, title=None, domain=None, version='', metadata=None):
+    """
+    Cache key for an article; runs of whitespace in the text do not matter.
+    metadata (e.g. the page's author) is part of the key when given.
+    """
+    digest = hashlib.sha256()
+    for part in (version, domain or '', title or '', ' '.join(text.split())):
+        digest.update(part.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+    if metadata:
+        digest.update(json.dumps(metadata, sort_keys=True, default=str).encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU memory tier in front of an optional SQLite tier (path=None keeps the
+    cache in memory only). Entries expire ttl seconds after they were stored;
+    the memory tier holds at most capacity entries and the SQLite tier at
+    most max_rows. Values must be JSON-serializable; both tiers keep them
+    serialized, so every get() returns a fresh copy callers may modify.
+    """
+
+    def __init__(self, path=None, capacity=1024, max_rows=100_000, ttl=7 * 24 * 3600):
+        self.capacity = capacity
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._puts = 0
+        self.path = path
+        self._pid = None
+        if path:
+            db = self._connection()
+            db.execute("""CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            db.commit()
+
+    def _connection(self):
+        # SQLite connections must not cross a fork, so a forked worker (batch_analyzer's
+        # pool, the scoring service's workers) opens its own on first use.
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._db
+
+    def get(self, key):
+        """Returns the cached value for a key, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return json.loads(item[1])
+                del self._memory[key]
+            if self.path is not None:
+                db = self._connection()
+                row = db.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                    db.commit()
+                    self._remember(key, row[1], row[0])
+                    self.stats['disk_hits'] += 1
+                    return json.loads(row[0])
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, value):
+        """Stores a value in both tiers."""
+        now = time.time()
+        expires_at = now + self.ttl
+        encoded = json.dumps(value)
+        with self._lock:
+            self._remember(key, expires_at, encoded)
+            if self.path is not None:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, encoded, expires_at, now))
+                self._puts += 1
+                # Counting rows is a full scan, so capacity is only enforced every 100 writes.
+                if self._puts % 100 == 0:
+                    self._evict_rows(db, now)
+                db.commit()
+
+    def _remember(self, key, expires_at, encoded):
+        self._memory[key] = (expires_at, encoded)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _evict_rows(self, db, now):
+        db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        excess = db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_rows
+        if excess > 0:
+            db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed_at LIMIT ?)", (excess,))
+            self.stats['evictions'] += excess
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.path is not None:
+                db = self._connection()
+                db.execute("DELETE FROM results")
+                db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
@@ -0,0 +1,110 @@
+# result_export.py
+
+"""
+Columnar export of scoring results to Parquet.
+
+Results from credibility_analyzer.analyze() (or the pipeline) are buffered
+column by column and written one row group at a time, so a stream of any
+length is exported in constant memory and never rendered as Markdown. One
+column is created per rule in CONFIG['rules']: int32 for count rules, bool
+for the others.
+
+    with ParquetResultWriter('scores.parquet') as writer:
+        for result in analyze_credibility_batch(urls):
+            writer.write(result)
+"""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import credibility_analyzer
+
+# Columns taken from the result dict itself; the rest come from result['features'].
+RESULT_COLUMNS = [
+    ('index', pa.int64()),
+    ('id', pa.string()),
+    ('url', pa.string()),
+    ('title', pa.string()),
+    ('final_score', pa.float64()),
+    ('rule_score', pa.float64()),
+    ('ml_score', pa.float64()),
+    ('decided_by', pa.string()),
+    ('error', pa.string()),
+]
+FEATURE_COLUMNS = [
+    ('domain', pa.string()),
+    ('domain_tier', pa.string()),
+    ('subjectivity', pa.float64()),
+    ('polarity', pa.float64()),
+    ('word_count', pa.int32()),
+    ('clickbait', pa.bool_()),
+]
+
+
+def result_schema(rules=None):
+    """Arrow schema of the export for a list of rule dicts (default CONFIG['rules'])."""
+    rules = credibility_analyzer.CONFIG['rules'] if rules is None else rules
+    rule_columns = [(rule['name'], pa.int32() if rule.get('mode') == 'count' else pa.bool_()) for rule in rules]
+    return pa.schema(RESULT_COLUMNS + FEATURE_COLUMNS + rule_columns)
+
+
+class ParquetResultWriter:
+    """
+    Streams result dicts into a Parquet file, row_group_size rows per row
+    group. Missing values (e.g. the scores of failed inputs) become nulls.
+    """
+
+    def __init__(self, path, rules=None, row_group_size=50_000, compression='zstd'):
+        self.schema = result_schema(rules)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._result_fields = [name for name, _ in RESULT_COLUMNS]
+        self._feature_fields = [field.name for field in self.schema][len(RESULT_COLUMNS):]
+        self._columns = {field.name: [] for field in self.schema}
+        self._buffered = 0
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, result):
+        columns = self._columns
+        for name in self._result_fields:
+            columns[name].append(result.get(name))
+        if result.get('id') is not None:
+            columns['id'][-1] = str(result['id'])
+        features = result.get('features') or {}
+        for name in self._feature_fields:
+            columns[name].append(features.get(name))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, results):
+        for result in results:
+            self.write(result)
+
+    def flush(self):
+        """Writes the buffered rows as one row group."""
+        if not self._buffered:
+            return
+        self._writer.write_table(pa.table(self._columns, schema=self.schema), row_group_size=self._buffered)
+        self.rows_written += self._buffered
+        self._columns = {name: [] for name in self._columns}
+        self._buffered = 0
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_results(results, path, **kwargs):
+    """Writes an iterable of result dicts to a Parquet file; returns the row count."""
+    with ParquetResultWriter(path, **kwargs) as writer:
+        writer.write_many(results)
+    return writer.rows_written
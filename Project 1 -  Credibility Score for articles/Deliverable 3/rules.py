@@ -0,0 +1,177 @@
+# rules.py
+
+"""
+Declarative text rules and the single-pass scanner they compile into.
+
+A rule is a dict:
+
+    name              feature name the scanner reports
+    keywords          case-insensitive whole words that trigger the rule
+    pattern           regex; with keywords it must match where the keyword
+                      starts, without keywords it is scanned for directly
+    word_start        the pattern only starts at the beginning of a word
+    literal           plain substring to count instead of a pattern
+    ignorecase        match pattern case-insensitively
+    window            only matches inside the first `window` characters count
+    metadata          page metadata field (e.g. 'author') that, when present,
+                      sets the feature without looking at the text
+    mode              'search' reports True/False, 'count' reports a count
+    label             heading used in explanations
+    weight / explanation             score change and text when found
+    miss_weight / miss_explanation   score change and text when not found
+
+Rules without a weight only provide features to composite rules in the
+analyzer (e.g. sensationalism). All keywords are merged into one trie-shaped
+alternation, and pattern-only rules become further alternatives of the same
+regex, so the text is scanned once and adding keyword rules barely changes
+the cost of a scan. Keywords and word_start patterns share a single
+start-of-word check, which is what keeps the scan cheap in CPython's regex
+engine. Pattern matches do not overlap each other, and a keyword inside a
+pattern match is not seen. Literal counts and the word count use
+str.count() and str.split(), which run faster than any regex alternative.
+"""
+
+import re
+
+DEFAULT_RULES = [
+    {'name': 'author', 'keywords': ['by', 'author'], 'pattern': r'(?:by|author)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+',
+     'ignorecase': True, 'window': 500, 'metadata': 'author', 'label': 'Author Presence',
+     'weight': 10, 'explanation': "An author byline was found.",
+     'miss_weight': -5, 'miss_explanation': "No clear author byline detected."},
+    {'name': 'citations', 'keywords': ['sources', 'references', 'citations', 'bibliography'], 'label': 'Citations',
+     'weight': 15, 'explanation': "The article appears to cite sources.",
+     'miss_weight': 0, 'miss_explanation': "No dedicated sources section found."},
+    {'name': 'all_caps', 'pattern': r'[A-Z]{4,}\b', 'word_start': True, 'mode': 'count'},
+    {'name': 'exclamations', 'literal': '!', 'mode': 'count'},
+]
+
+# Checked against the title only, so they stay separate from the body scan.
+CLICKBAIT_PATTERNS = [r'\b(will blow your mind|you won\'t believe|shocking|secret|what happens next)\b', r'\?$', r'^\d+\s+(reasons|tips|tricks|ways)\s+']
+CLICKBAIT_RE = re.compile('|'.join(f'(?:{p})' for p in CLICKBAIT_PATTERNS), re.IGNORECASE)
+
+
+def format_explanation(points, label, message):
+    """Formats a rule outcome the way the report lists it: '[+10] **Label**: message'."""
+    prefix = f"[{points:+d}]" if points else "[+/- 0]"
+    return f"{prefix} **{label}**: {message}"
+
+
+def _trie_regex(words):
+    # Builds an alternation with shared prefixes factored out, e.g.
+    # ['by', 'bias'] -> 'b(?:ias|y)', so each position is rejected after
+    # comparing a character or two no matter how many keywords there are.
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' in node:
+            return f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+class RuleScanner:
+    """Compiles a list of rule dicts once and extracts every rule's feature in one pass."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._keyword_rules = {}
+        self._pattern_rules = {}
+        self._literal_rules = []
+        word_alternatives, alternatives = [], []
+        for i, rule in enumerate(self.rules):
+            flags = re.IGNORECASE if rule.get('ignorecase') else 0
+            if rule.get('keywords'):
+                verify = re.compile(rule['pattern'], flags) if rule.get('pattern') else None
+                for keyword in rule['keywords']:
+                    self._keyword_rules.setdefault(keyword.lower(), []).append((rule, verify))
+            elif rule.get('literal'):
+                self._literal_rules.append(rule)
+            else:
+                group = f"_r{i}"
+                self._pattern_rules[group] = rule
+                target = word_alternatives if rule.get('word_start') else alternatives
+                target.append(f"(?P<{group}>{'(?i:' if flags else '(?:'}{rule['pattern']}))")
+        if self._keyword_rules:
+            # Zero-width, so a keyword can still be matched by a pattern rule at the same spot.
+            word_alternatives.insert(0, rf"(?=(?P<_kw>(?i:{_trie_regex(self._keyword_rules)}))(?!\w))")
+        if word_alternatives:
+            alternatives.insert(0, rf"(?<!\w)(?:{'|'.join(word_alternatives)})")
+        self._scanner = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def scan(self, text, metadata=None):
+        """
+        Returns {rule name: feature} plus 'word_count' for a text. metadata is
+        the page's extracted metadata dict, for rules that declare a field.
+        """
+        features = {rule['name']: 0 if rule.get('mode') == 'count' else False for rule in self.rules}
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                group = match.lastgroup
+                if group == '_kw':
+                    start = match.start()
+                    for rule, verify in self._keyword_rules[match.group('_kw').lower()]:
+                        window = rule.get('window')
+                        if features[rule['name']] is True or (window is not None and start >= window):
+                            continue
+                        if verify is not None and not verify.match(text, start, window or len(text)):
+                            continue
+                        if window is not None and verify is None and match.end('_kw') > window:
+                            continue
+                        self._record(features, rule)
+                else:
+                    rule = self._pattern_rules[group]
+                    window = rule.get('window')
+                    if window is None or match.end() <= window:
+                        self._record(features, rule)
+        for rule in self._literal_rules:
+            count = text.count(rule['literal'], 0, rule.get('window') or len(text))
+            features[rule['name']] = count if rule.get('mode') == 'count' else count > 0
+        features['word_count'] = len(text.split())
+        return self.apply_metadata(features, metadata) if metadata else features
+
+    def apply_metadata(self, features, metadata):
+        """
+        Copy of text features from scan(text) with the rules that declare a
+        metadata field applied, i.e. scan(text, metadata) without rescanning.
+        """
+        features = dict(features)
+        for rule in self.rules:
+            if rule.get('metadata') and metadata and metadata.get(rule['metadata']):
+                self._record(features, rule)
+        return features
+
+    @staticmethod
+    def _record(features, rule):
+        if rule.get('mode') == 'count':
+            features[rule['name']] += 1
+        else:
+            features[rule['name']] = True
+
+    def score(self, features):
+        """
+        Applies the weighted rules to scanned features. Returns (points,
+        explanations) in rule order; count rules score when their count is
+        non-zero.
+        """
+        points, explanations = 0, []
+        for rule in self.rules:
+            if 'weight' not in rule:
+                continue
+            if features[rule['name']]:
+                weight, message = rule['weight'], rule['explanation']
+            else:
+                weight, message = rule.get('miss_weight', 0), rule.get('miss_explanation')
+            points += weight
+            if message:
+                explanations.append(format_explanation(weight, rule['label'], message))
+        return points, explanations
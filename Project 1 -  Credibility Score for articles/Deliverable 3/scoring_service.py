@@ -0,0 +1,293 @@
+# scoring_service.py
+
+"""
+HTTP/JSON scoring service for other programs.
+
+    POST /v1/score         {"url": ...} or {"text": ...}, optionally with an "id"
+    POST /v1/score/batch   {"items": [<item>, ...]} (at most MAX_BATCH_ITEMS)
+    GET  /healthz
+    GET  /metrics          Prometheus text, summed over all workers
+
+Answers are credibility_analyzer.analyze() result dicts (the batch endpoint
+returns {"results": [...]} in item order, each with its 'index'), not the
+Markdown report. Items that are not a URL/text string or object come back
+with error 'invalid_record'; a body that is not valid JSON is a 400.
+
+The server is preforked: the parent binds the socket and loads the NLP
+stack once, then forks the workers, which share the loaded models
+copy-on-write and accept connections from the same socket. Each worker
+handles its connections in threads, so fetches overlap while scoring
+spreads over the processes. Every worker publishes its metrics to a
+shared directory about once a second, and /metrics renders their sum.
+
+    python scoring_service.py --port 8000 --workers 4
+
+benchmarks.load measures throughput and latency against a running service.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import credibility_analyzer
+import metrics
+from batch_analyzer import analyze_credibility_batch
+
+MAX_BODY_BYTES = 10_000_000
+MAX_BATCH_ITEMS = 256
+# How often each worker of a preforked service publishes its metrics for /metrics.
+METRICS_PUBLISH_SECONDS = 1.0
+
+REQUESTS = metrics.counter('scoring_service_requests_total', "HTTP requests by endpoint and status.", ['endpoint', 'status'])
+REQUEST_SECONDS = metrics.histogram('scoring_service_request_seconds', "Seconds per HTTP request.", ['endpoint'])
+
+# Directory the workers of a preforked service publish their metrics to (None with one process).
+_metrics_dir = None
+
+
+def _publish_metrics():
+    # Replaces this worker's file atomically, so readers never see half of it.
+    path = os.path.join(_metrics_dir, f"{os.getpid()}.json")
+    partial = f"{path}.{threading.get_ident()}.tmp"
+    with open(partial, 'w') as f:
+        json.dump(metrics.export_state(), f)
+    os.replace(partial, path)
+
+
+def _metrics_publisher():
+    while True:
+        time.sleep(METRICS_PUBLISH_SECONDS)
+        if metrics.is_enabled():
+            _publish_metrics()
+
+
+def render_metrics():
+    """
+    Prometheus text for the whole service: with several workers, the sum of
+    what each last published (this worker's values are current).
+    """
+    if _metrics_dir is None:
+        return metrics.render_prometheus()
+    _publish_metrics()
+    states = []
+    for name in os.listdir(_metrics_dir):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(_metrics_dir, name)) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                pass
+    return metrics.render_prometheus(states)
+
+
+def parse_item(item):
+    """
+    Turns a request item into (id, input): a URL or text string, or an
+    object with a 'url' or 'text' string. Raises ValueError otherwise.
+    """
+    if isinstance(item, str):
+        return None, item
+    if not isinstance(item, dict) or not isinstance(item.get('url') or item.get('text'), str):
+        raise ValueError("item needs a 'url' or 'text' string")
+    return item.get('id'), item.get('url') or item['text']
+
+
+def score_item(item):
+    """Scores one request item; raises ValueError for a malformed one."""
+    return _score(*parse_item(item))
+
+
+def _score(record_id, user_input):
+    result = credibility_analyzer.analyze(user_input)
+    if record_id is not None:
+        result['id'] = record_id
+    return result
+
+
+def score_batch(items):
+    """
+    Scores a list of request items, fetching their URLs concurrently.
+    Returns the results in item order; malformed items get 'invalid_record'.
+    """
+    results, valid = [None] * len(items), []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index,) + parse_item(item))
+        except ValueError as e:
+            result = credibility_analyzer.new_result(item if isinstance(item, str) else json.dumps(item))
+            result.update(error='invalid_record', error_detail=str(e), index=index)
+            results[index] = result
+    # One worker: the service's processes already spread batches over the cores.
+    # One chunk, so every URL of the batch is fetched at once.
+    scored = analyze_credibility_batch([user_input for _, _, user_input in valid], workers=1,
+                                       chunksize=max(1, len(valid)))
+    for (index, record_id, _), result in zip(valid, scored):
+        result['index'] = index
+        if record_id is not None:
+            result['id'] = record_id
+        results[index] = result
+    return results
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'CredibilityScoring/1.0'
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/healthz':
+            self._send_json(200, {'status': 'ok', 'pid': os.getpid()})
+        elif path == '/metrics':
+            self._send(200, render_metrics().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(404, {'error': 'not_found'})
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        if path not in ('/v1/score', '/v1/score/batch'):
+            # The body is left unread, so the connection cannot carry another request.
+            self.close_connection = True
+            self._send_json(404, {'error': 'not_found'}); return
+        start = time.perf_counter()
+        status, payload = self._handle(path)
+        self._send_json(status, payload)
+        REQUESTS.inc(path, str(status))
+        REQUEST_SECONDS.observe(time.perf_counter() - start, path)
+
+    def _handle(self, path):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            # A body without a length (e.g. chunked) cannot be skipped, so the connection is closed.
+            self.close_connection = True
+            return 411, {'error': 'length_required', 'error_detail': "Content-Length header required"}
+        try:
+            length = int(length)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True
+            return 400, {'error': 'invalid_length', 'error_detail': f"invalid Content-Length {length!r}"}
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return 413, {'error': 'too_large', 'error_detail': f"body over {MAX_BODY_BYTES} bytes"}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            return 400, {'error': 'invalid_json', 'error_detail': str(e)}
+        if path == '/v1/score':
+            try:
+                item = parse_item(body)
+            except ValueError as e:
+                return 400, {'error': 'invalid_record', 'error_detail': str(e)}
+        else:
+            items = body.get('items') if isinstance(body, dict) else None
+            if not isinstance(items, list):
+                return 400, {'error': 'invalid_record', 'error_detail': "body needs an 'items' list"}
+            if len(items) > MAX_BATCH_ITEMS:
+                return 413, {'error': 'too_large', 'error_detail': f"at most {MAX_BATCH_ITEMS} items per batch"}
+        # The input is valid from here on: anything raised while scoring is the service's fault.
+        try:
+            if path == '/v1/score':
+                return 200, _score(*item)
+            return 200, {'results': score_batch(items)}
+        except Exception as e:
+            credibility_analyzer.ERRORS.inc('internal_error')
+            return 500, {'error': 'internal_error', 'error_detail': f"{type(e).__name__}: {e}"}
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Connections queued while every worker is busy.
+    request_queue_size = 128
+
+
+def serve(host='127.0.0.1', port=8000, workers=None, ready=None):
+    """
+    Binds host:port, loads the models and serves from `workers` forked
+    processes (default: one per CPU) until SIGINT/SIGTERM. workers=1 serves
+    from this process. ready, if given, is called with the bound
+    (host, port) once the service accepts connections.
+    """
+    workers = workers or os.cpu_count() or 1
+    server = ScoringServer((host, port), ScoringHandler)
+    credibility_analyzer.warm_up()
+    if ready:
+        ready(server.server_address[:2])
+    if workers == 1:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    global _metrics_dir
+    _metrics_dir = tempfile.mkdtemp(prefix='scoring-metrics-')
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # The warm-up's values would otherwise be counted once per worker.
+            metrics.reset()
+            threading.Thread(target=_metrics_publisher, name='metrics-publisher', daemon=True).start()
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while children:
+            pid, _ = os.wait()
+            children.remove(pid)
+    except KeyboardInterrupt:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        server.server_close()
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve credibility scores over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help="0 picks a free port.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU).")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers,
+          ready=lambda address: print(f"Serving on http://{address[0]}:{address[1]} with "
+                                      f"{args.workers or os.cpu_count() or 1} worker(s)", file=sys.stderr, flush=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 # tests/test_analyzer.py
 
 # Import the function we want to test
-from credibility_analyzer import calculate_rule_based_score
+import credibility_analyzer
+from credibility_analyzer import analyze, calculate_rule_based_score, extract_article, render_report
 
 def test_clickbait_headline_penalty():
     """
@@ -21,4 +22,66 @@ def test_clickbait_headline_penalty():
 
     # Optional: Check if the explanation text is present
     has_clickbait_explanation = any("clickbait" in exp.lower() for exp in explanations)
-    assert has_clickbait_explanation is True
\ No newline at end of file
+    assert has_clickbait_explanation is True
+
+def test_extract_article_returns_text_title_and_metadata():
+    """
+    One parse yields the body, the <title> and the page metadata, and the byline metadata satisfies the author rule.
+    """
+    body = "The council approved the budget on Tuesday after a long hearing. " * 20
+    page = ('<html><head><title>Budget approved | Daily Planet</title><meta name="author" content="Jane Doe">'
+            '<meta property="og:site_name" content="Daily Planet"><meta property="article:published_time" content="2024-05-02T10:00:00Z">'
+            f'</head><body><article><p>{body}</p></article></body></html>')
+
+    article = extract_article(page)
+    result = analyze("https://planet.example.com/budget", downloaded=page)
+
+    assert article['text'] == body.strip()
+    assert (article['title'], article['author'], article['date'], article['sitename']) == ("Budget approved | Daily Planet", "Jane Doe", "2024-05-02", "Daily Planet")
+    assert result['features']['author'] is True and result['metadata']['author'] == "Jane Doe"
+
+def test_cascade_skips_ml_only_outside_the_uncertainty_band(monkeypatch):
+    """
+    With the cascade on, a known low-credibility domain decides without the ML engine; an unlisted one still runs it.
+    """
+    body = "The council approved the budget on Tuesday after a long hearing. " * 20
+    page = f"<html><head><title>Budget</title></head><body><article><p>{body}</p></article></body></html>"
+    monkeypatch.setitem(credibility_analyzer.CONFIG, 'cascade', {'enabled': True, 'uncertainty_band': (30, 70)})
+    calls = []
+    monkeypatch.setattr(credibility_analyzer, "text_sentiment", lambda text: calls.append(text) or (0.0, 0.2))
+
+    decided = analyze("https://www.infowars.com/budget", downloaded=page)
+    assert calls == [] and decided['decided_by'] == 'rules'
+    assert decided['ml_score'] is None and decided['final_score'] == decided['rule_score'] < 30
+    assert "Decided by the rule-based tier" in render_report(decided)
+
+    uncertain = analyze("https://planet.example.com/budget", downloaded=page)
+    assert len(calls) == 1 and uncertain['decided_by'] == 'ml' and uncertain['ml_score'] is not None
+    assert "Decided by the linguistic tier" in render_report(uncertain)
+
+def test_chunked_ml_score_matches_whole_text_and_sampling_caps_it(monkeypatch):
+    """
+    Chunk-by-chunk scoring stays close to scoring the whole text; a word cap samples one chunk per stratum and reports its margin.
+    """
+    from benchmarks.corpus import generate_corpus
+    text = "\n\n".join(article['text'] for article in generate_corpus({'short': 0, 'medium': 4, 'large': 0}))
+    whole, _ = credibility_analyzer.calculate_ml_score(text)
+    monkeypatch.setitem(credibility_analyzer.CONFIG, 'ml_chunking', {'enabled': True, 'min_words': 1000, 'chunk_words': 200, 'max_words': None})
+    chunked, explanations = credibility_analyzer.calculate_ml_score(text)
+    assert abs(chunked - whole) < 2 and "Chunked Analysis" in explanations[-1]
+
+    polarity, subjectivity, sampling = credibility_analyzer.chunked_sentiment(text, chunk_words=200, max_words=1000)
+    assert sampling['total_words'] == len(text.split()) and sampling['analyzed_chunks'] == 5
+    assert sampling['analyzed_words'] < sampling['total_words'] / 2 and sampling['margin'] > 0
+    assert credibility_analyzer.chunked_sentiment(text, chunk_words=200, max_words=1000)[2] == sampling
+
+def test_text_without_sentence_breaks_is_still_chunked():
+    """
+    Unpunctuated text and one-line lists are cut at twice the chunk size, so the word cap holds for them too.
+    """
+    unpunctuated = " ".join(["word"] * 100_000)
+    listing = "\n".join(f"item {i} on the list" for i in range(10_000))
+    for text in (unpunctuated, listing):
+        _, _, sampling = credibility_analyzer.chunked_sentiment(text, chunk_words=1000, max_words=5000)
+        assert sampling['total_words'] == len(text.split()) and sampling['chunks'] >= 25
+        assert sampling['analyzed_chunks'] == 5 and sampling['analyzed_words'] <= 10_000
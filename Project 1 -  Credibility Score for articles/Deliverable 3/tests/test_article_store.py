@@ -0,0 +1,56 @@
+# tests/test_article_store.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import credibility_analyzer
+import fetcher
+from article_store import ArticleStore
+
+def _result(url, score):
+    return {'input': url, 'url': url, 'title': "T", 'final_score': score, 'rule_score': score, 'ml_score': score, 'error': None}
+
+def _write_many(path, worker):
+    store = ArticleStore(path)
+    for i in range(50):
+        store.record(_result(f"https://w{worker}.example.com/{i}", i))
+    store.close()
+
+def test_recent_and_worst_for_domain(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    store.record(_result("https://www.Example.com/a?utm_source=x", 40), analyzed_at=time.time() - 2 * 24 * 3600)
+    store.record(_result("https://example.com/b", 80))
+    store.record(_result("https://example.com/c", 20))
+    store.record(_result("https://other.org/d", 5))
+
+    assert store.recent("https://www.example.com/a") is None
+    assert store.recent("https://www.example.com/a", max_age=3 * 24 * 3600)['final_score'] == 40
+    assert [r['url'] for r in store.worst_for_domain("example.com", limit=2)] == ["https://example.com/c", "https://www.Example.com/a?utm_source=x"]
+    assert [r['final_score'] for r in store.in_score_range(10, 50)] == [20, 40]
+
+def test_concurrent_writer_processes(tmp_path):
+    """
+    Several processes writing to one file lose no rows.
+    """
+    path = str(tmp_path / "articles.sqlite")
+    ArticleStore(path).close()
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_write_many, [path] * 4, range(4)))
+
+    assert ArticleStore(path).count() == 200
+
+def test_analyzer_records_and_reuses(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    page = "<html><head><title>Budget</title></head><body><article><p>" + "The council approved the budget on Tuesday. " * 20 + "</p></article></body></html>"
+    downloads = []
+    monkeypatch.setattr(fetcher, 'fetch_url', lambda url: downloads.append(url) or page)
+    credibility_analyzer.set_article_store(store, reuse_for=3600)
+    try:
+        first = credibility_analyzer.analyze("https://news.example.com/budget")
+        second = credibility_analyzer.analyze("https://news.example.com/budget")
+    finally:
+        credibility_analyzer.set_article_store(None)
+
+    assert len(downloads) == 1
+    assert second['final_score'] == first['final_score'] and 'analyzed_at' in second
@@ -0,0 +1,50 @@
+# tests/test_batch_analyzer.py
+
+import credibility_analyzer
+import fetcher
+from batch_analyzer import analyze_credibility_batch
+
+ARTICLE = "The city council approved the new transit budget after a long public hearing on Tuesday. " * 10
+
+def test_batch_returns_structured_results_in_input_order():
+    """
+    Every input gets a result, in input order, including ones that cannot be scored.
+    """
+    inputs = [ARTICLE, "Too short to score.", ARTICLE.upper()]
+
+    results = list(analyze_credibility_batch(inputs, workers=2, chunksize=1))
+
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert results[0]['error'] is None and 0 <= results[0]['final_score'] <= 100
+    assert results[1]['error'] == 'too_short' and results[1]['final_score'] is None
+    assert results[2]['rule_score'] < results[0]['rule_score']
+
+def test_unordered_batch_covers_every_input():
+    """
+    Completion-order mode still yields exactly one result per input.
+    """
+    results = list(analyze_credibility_batch([ARTICLE] * 10, workers=2, ordered=False, chunksize=3))
+
+    assert sorted(r['index'] for r in results) == list(range(10))
+
+def test_failed_input_keeps_the_result_schema(monkeypatch):
+    """
+    An exception while scoring one input becomes an 'internal_error' result with every usual key.
+    """
+    def fail(result, text):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(credibility_analyzer, "score_content", fail)
+    [result] = analyze_credibility_batch([ARTICLE], workers=1)
+
+    assert result.keys() >= credibility_analyzer.new_result(ARTICLE).keys()
+    assert result['error'] == 'internal_error' and result['error_detail'] == "RuntimeError: boom"
+    assert credibility_analyzer.render_report(result) == credibility_analyzer.ERROR_MESSAGES['internal_error']
+
+def test_failed_prefetch_does_not_stop_the_batch(monkeypatch):
+    def fail(urls):
+        raise RuntimeError("event loop closed")
+    monkeypatch.setattr(fetcher, "fetch_urls", fail)
+    monkeypatch.setattr(fetcher, "fetch_url", lambda url: None)
+    results = list(analyze_credibility_batch(["https://example.com/a", ARTICLE], workers=1))
+
+    assert [r['error'] for r in results] == ['fetch_failed', None]
@@ -0,0 +1,25 @@
+# tests/test_benchmarks.py
+
+from benchmarks.compare import compare_results
+from benchmarks.corpus import LARGE_BYTES, generate_corpus, load_corpus, save_corpus
+from benchmarks.run import run_benchmarks
+
+def test_corpus_covers_every_category(tmp_path):
+    """
+    Every size/tone/title combination is generated, large articles reach 200 KB, and the corpus round-trips through disk.
+    """
+    corpus = generate_corpus({'short': 1, 'medium': 1, 'large': 1})
+    save_corpus(corpus, tmp_path)
+
+    assert len({a['category'] for a in corpus}) == 12
+    assert all(len(a['text']) >= LARGE_BYTES for a in corpus if a['size'] == 'large')
+    assert load_corpus(tmp_path) == corpus
+
+def test_run_and_compare_flag_regressions():
+    corpus = [a for a in generate_corpus({'short': 2, 'medium': 0, 'large': 0}) if a['tone'] == 'neutral']
+    before = {'results': run_benchmarks(corpus, ['rule_based'], repeats=1)}
+    after = {'results': {'rule_based': {c: dict(s, median_s=s['median_s'] * 2) for c, s in before['results']['rule_based'].items()}}}
+
+    rows = compare_results(before, after, threshold=0.5)
+
+    assert len(rows) == 2 and all(row[-1] for row in rows)
@@ -0,0 +1,36 @@
+# tests/test_domain_blocklist.py
+
+from domain_blocklist import DomainBlocklist, build_blocklist_from_feed
+from domain_index import DomainIndex
+
+def test_build_and_lookup(tmp_path):
+    """
+    A feed round-trips through the binary file and matches on label boundaries.
+    """
+    feed = tmp_path / "feed.txt"
+    feed.write_text("# misinformation feed\nhoax-news.example\n0.0.0.0 fake.example\nhoax-news.example\n")
+    path = tmp_path / "low.cdbl"
+
+    assert build_blocklist_from_feed(feed, path) == 2
+
+    blocklist = DomainBlocklist(path)
+    assert len(blocklist) == 2
+    assert "fake.example" in blocklist
+    assert blocklist.match("www.hoax-news.example") == "hoax-news.example"
+    assert blocklist.match("nothoax-news.example") is None
+    blocklist.close()
+
+def test_attached_blocklist_feeds_index(tmp_path):
+    """
+    The most specific suffix wins between the trie and an attached blocklist.
+    """
+    feed = tmp_path / "feed.txt"
+    feed.write_text("blogs.example.org\n")
+    path = tmp_path / "low.cdbl"
+    build_blocklist_from_feed(feed, path, bits_per_entry=0)
+
+    index = DomainIndex.from_tiers({'high_credibility': ['example.org']})
+    index.attach(DomainBlocklist(path), 'low_credibility')
+
+    assert index.lookup('www.example.org') == 'high_credibility'
+    assert index.match('me.blogs.example.org') == ('low_credibility', 'blogs.example.org')
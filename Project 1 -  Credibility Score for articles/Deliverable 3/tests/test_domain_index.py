@@ -0,0 +1,37 @@
+# tests/test_domain_index.py
+
+from domain_index import DomainIndex
+from credibility_analyzer import calculate_rule_based_score
+
+def test_most_specific_tier_wins():
+    """
+    A more specific suffix overrides the tier of a broader one.
+    """
+    index = DomainIndex.from_tiers({'high_credibility': ['.gov'], 'low_credibility': ['spoof.gov']})
+
+    assert index.lookup('www.cdc.gov') == 'high_credibility'
+    assert index.match('news.spoof.gov') == ('low_credibility', 'spoof.gov')
+
+def test_matching_respects_label_boundaries():
+    """
+    'notreuters.com' must not be treated as 'reuters.com'.
+    """
+    dummy_text = "This is some sample text for the article. " * 20
+
+    _, explanations = calculate_rule_based_score(text=dummy_text, url="https://notreuters.com/story")
+    assert any("not on predefined lists" in exp for exp in explanations)
+
+    _, explanations = calculate_rule_based_score(text=dummy_text, url="https://www.reuters.com/story")
+    assert any("highly credible" in exp for exp in explanations)
+
+def test_load_file_skips_comments(tmp_path):
+    """
+    The bulk loader reads plain and hosts-file style lists.
+    """
+    feed = tmp_path / "feed.txt"
+    feed.write_text("# header\nfake-news.example\n0.0.0.0 hoax.example  # hosts entry\n\n")
+
+    index = DomainIndex()
+    assert index.load_file(feed, 'low_credibility') == 2
+    assert index.lookup('a.hoax.example') == 'low_credibility'
+    assert index.lookup('example') is None
@@ -0,0 +1,122 @@
+# tests/test_domain_stats.py
+
+import os
+import statistics
+
+import credibility_analyzer
+from domain_stats import DomainStats, RunningStats
+from result_cache import ResultCache
+
+ARTICLE = "The regional health agency released its quarterly vaccination figures on Monday. " * 8
+
+def test_running_stats_match_a_full_recomputation():
+    values = [12.5, 80.0, 55.25, 55.0, 99.9, 0.0, 43.0]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert abs(stats.mean - statistics.mean(values)) < 1e-9
+    assert abs(stats.variance - statistics.pvariance(values)) < 1e-9
+    assert stats.quantile(0.5) == 55 and stats.quantile(0) == 0 and stats.quantile(1) == 100
+
+def test_aggregates_are_persisted(tmp_path):
+    path = tmp_path / "domain_stats.sqlite"
+    stats = DomainStats(path)
+    stats.update("example.com", 60.0, 70.0)
+    stats.update("example.com", 40.0, None)
+    stats.update("other.org", 90.0, 95.0)
+    stats.close()
+
+    reopened = DomainStats(path)
+    assert len(reopened) == 2
+    assert reopened.get("example.com")['final'].mean == 50.0 and reopened.get("example.com")['ml'].count == 1
+    assert reopened.overall()['final'].count == 3
+    assert reopened.summary("other.org")['ml']['median'] == 95
+
+def test_processes_sharing_the_file_add_up(tmp_path):
+    """
+    Each process's updates are merged into the stored aggregates, not written over another's.
+    """
+    path = tmp_path / "domain_stats.sqlite"
+    stats = DomainStats(path)
+    stats.update("a.com", 60.0, 60.0)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if stats.update("a.com", 80.0, None, article="https://a.com/1") else 1)
+        except BaseException:
+            os._exit(1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert stats.update("a.com", 40.0, None, article="https://a.com/2")
+    assert stats.update("a.com", 80.0, None, article="https://a.com/1") is False
+    assert stats.get("a.com")['final'].count == 3 and stats.get("a.com")['ml'].count == 1
+    stats.close()
+
+    reopened = DomainStats(path)
+    assert reopened.get("a.com")['final'].count == 3 and reopened.get("a.com")['final'].mean == 60.0
+    assert abs(reopened.get("a.com")['final'].variance - statistics.pvariance([60.0, 80.0, 40.0])) < 1e-9
+    assert reopened.overall()['final'].count == 3
+
+def test_unlisted_domain_is_scored_from_its_history(monkeypatch):
+    """
+    Analyses feed the aggregates; once a domain has enough of them its mean ML score moves its reputation points.
+    """
+    stats = DomainStats()
+    for _ in range(5):
+        stats.update("steady.example", 70.0, 90.0)
+        stats.update("ranty.example", 30.0, 40.0)
+    credibility_analyzer.set_domain_stats(stats)
+    monkeypatch.setitem(credibility_analyzer.CONFIG, 'learned_reputation',
+                        {'enabled': True, 'min_count': 5, 'points_per_std': 10, 'max_points': 15})
+    try:
+        steady = credibility_analyzer.score_text(ARTICLE, "https://steady.example/a")
+        ranty = credibility_analyzer.score_text(ARTICLE, "https://ranty.example/a")
+        unknown = credibility_analyzer.score_text(ARTICLE, "https://new.example/a")
+        result = credibility_analyzer.analyze("https://new.example/b", downloaded=f"<html><body><article><p>{ARTICLE}</p></article></body></html>")
+    finally:
+        credibility_analyzer.set_domain_stats(None)
+    assert steady['features']['learned_reputation'] == 10 and ranty['features']['learned_reputation'] == -10
+    assert steady['rule_score'] - unknown['rule_score'] == 10
+    assert "5 scored articles average 90.0" in steady['rule_explanations'][0]
+    assert 'learned_reputation' not in unknown['features']
+    assert stats.get("new.example")['final'].count == 1 and stats.get("new.example")['final'].mean == result['final_score']
+
+def test_reanalyzed_article_is_counted_once(tmp_path):
+    """
+    Re-analyzing a URL (tracking parameters aside) or hitting the result cache does not add to the aggregates.
+    """
+    page = f"<html><body><article><p>{ARTICLE}</p></article></body></html>"
+    stats = DomainStats(tmp_path / "domain_stats.sqlite")
+    credibility_analyzer.set_domain_stats(stats)
+    credibility_analyzer.set_result_cache(ResultCache())
+    try:
+        for url in ("https://repeat.example/a", "https://repeat.example/a?utm_source=feed", "https://repeat.example/a"):
+            credibility_analyzer.analyze(url, downloaded=page)
+        # The same text under another URL of the domain is a result-cache hit.
+        credibility_analyzer.analyze("https://repeat.example/b", downloaded=page)
+    finally:
+        credibility_analyzer.set_domain_stats(None)
+        credibility_analyzer.set_result_cache(None)
+    assert stats.get("repeat.example")['final'].count == 1
+    stats.close()
+    assert DomainStats(tmp_path / "domain_stats.sqlite").update("repeat.example", 50.0, article="https://repeat.example/a") is False
+
+def test_cached_score_follows_learned_reputation(monkeypatch):
+    """
+    A score cached before the domain had enough history is not served once its reputation is learned.
+    """
+    stats = DomainStats()
+    credibility_analyzer.set_domain_stats(stats)
+    credibility_analyzer.set_result_cache(ResultCache())
+    monkeypatch.setitem(credibility_analyzer.CONFIG, 'learned_reputation',
+                        {'enabled': True, 'min_count': 5, 'points_per_std': 10, 'max_points': 15})
+    try:
+        stats.update("other.example", 50.0, 40.0)
+        before = credibility_analyzer.score_text(ARTICLE, "https://growing.example/a")
+        for _ in range(5):
+            stats.update("growing.example", 70.0, 90.0)
+        after = credibility_analyzer.score_text(ARTICLE, "https://growing.example/a")
+    finally:
+        credibility_analyzer.set_domain_stats(None)
+        credibility_analyzer.set_result_cache(None)
+    assert 'learned_reputation' not in before['features']
+    assert after['features']['learned_reputation'] > 0 and after['rule_score'] > before['rule_score']
@@ -0,0 +1,49 @@
+# tests/test_fast_sentiment.py
+
+import pytest
+from textblob import TextBlob
+
+import credibility_analyzer
+from fast_sentiment import TOLERANCE, LexiconSentiment
+
+TEXTS = [
+    "The council approved the new budget on Tuesday after a long debate.",
+    "This is a very good idea, but the execution was not good at all!",
+    "I really do not like it. It is never a great sign when results are terrible!!",
+    "Absolutely wonderful, extremely happy with the outcome and not bad either.",
+    "",
+]
+
+@pytest.fixture(scope='module')
+def engine():
+    return LexiconSentiment()
+
+def test_matches_textblob_on_negation_and_intensifiers(engine):
+    polarity, subjectivity = engine.sentiment_batch(TEXTS)
+
+    for text, p, s in zip(TEXTS, polarity, subjectivity):
+        expected = TextBlob(text).sentiment
+        assert p == pytest.approx(expected.polarity, abs=1e-9)
+        assert s == pytest.approx(expected.subjectivity, abs=1e-9)
+
+def test_batch_mean_error_within_tolerance(engine):
+    """
+    Thousands of documents are scored in one call and stay within the documented mean tolerance.
+    """
+    texts = [" ".join(TEXTS[(i + j) % 4] for j in range(i % 3 + 1)) for i in range(2000)]
+
+    polarity, subjectivity = engine.sentiment_batch(texts)
+
+    sample = range(0, 2000, 97)
+    errors = [abs(polarity[i] - TextBlob(texts[i]).sentiment.polarity) + abs(subjectivity[i] - TextBlob(texts[i]).sentiment.subjectivity)
+              for i in sample]
+    assert len(polarity) == 2000
+    assert sum(errors) / len(errors) <= TOLERANCE
+
+def test_numpy_engine_in_analyzer(monkeypatch):
+    monkeypatch.setitem(credibility_analyzer.CONFIG, 'ml_engine', 'numpy')
+
+    batch = credibility_analyzer.calculate_ml_scores([TEXTS[1], "  "])
+
+    assert batch[0] == credibility_analyzer.calculate_ml_score(TEXTS[1])
+    assert batch[1][0] == 0
@@ -0,0 +1,94 @@
+# tests/test_fetcher.py
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+from http_cache import HttpCache
+
+PAGE = b"<html><head><title>Stand-in</title></head><body><p>Hello</p></body></html>"
+LARGE_PAGE = b"<html><head><title>Long read</title></head><body>" + b"<p>Another paragraph of the story.</p>" * 150_000 + b"</body></html>"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = {}
+
+    def do_GET(self):
+        count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        # /flaky fails twice before answering, everything else answers at once.
+        status = 503 if self.path == "/flaky" and count <= 2 else 404 if self.path == "/missing" else 200
+        if self.headers.get("If-None-Match") == '"v1"':
+            status = 304
+        body = PAGE if status == 200 else b"" if status == 304 else b"error"
+        if self.path == "/large":
+            body = LARGE_PAGE
+        self.send_response(status)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Written in pieces with pauses, so the body spans many socket reads.
+        for start in range(0, len(body), 1 << 20):
+            self.wfile.write(body[start:start + (1 << 20)])
+            self.wfile.flush()
+            if len(body) > 1 << 20:
+                time.sleep(0.01)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    """
+    A local HTTP server standing in for news sites.
+    """
+    StandInHandler.hits = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    fetcher.set_fetcher(fetcher.AsyncFetcher(retries=2, backoff=0.01))
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    fetcher.set_fetcher(None)
+
+def test_fetch_url_returns_decoded_html(server):
+    assert fetcher.fetch_url(server + "/article") == PAGE.decode()
+    assert fetcher.fetch_url(server + "/missing") is None
+
+def test_large_body_is_read_in_full(server):
+    """
+    A multi-megabyte page comes back whole, not just its first buffered bytes.
+    """
+    assert fetcher.fetch_url(server + "/large") == LARGE_PAGE.decode()
+    fetcher.set_fetcher(fetcher.AsyncFetcher(max_bytes=1_000_000))
+    assert fetcher.fetch_url(server + "/large") is None
+
+def test_retryable_status_is_retried(server):
+    """
+    Two 503 answers are retried with backoff before the page is returned.
+    """
+    assert fetcher.fetch_url(server + "/flaky") == PAGE.decode()
+    assert StandInHandler.hits["/flaky"] == 3
+
+def test_fetch_urls_keeps_input_order(server):
+    urls = [server + f"/page{i}" for i in range(10)] + [server + "/missing"]
+
+    pages = fetcher.fetch_urls(urls)
+
+    assert pages[:10] == [PAGE.decode()] * 10 and pages[10] is None
+
+def test_cached_page_is_revalidated_with_conditional_get(server, tmp_path):
+    """
+    The second fetch sends the stored ETag and is answered from disk on a 304.
+    """
+    cache = HttpCache(tmp_path, compress=True)
+    fetcher.set_fetcher(fetcher.AsyncFetcher(cache=cache))
+
+    first = fetcher.fetch_url(server + "/article?utm_source=feed")
+    second = fetcher.fetch_url(server + "/article")
+
+    assert first == second == PAGE.decode()
+    assert cache.stats["misses"] == 1
+    assert cache.stats["hits"] == cache.stats["revalidations"] == 1
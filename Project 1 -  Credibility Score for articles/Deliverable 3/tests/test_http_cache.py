@@ -0,0 +1,22 @@
+# tests/test_http_cache.py
+
+from http_cache import HttpCache, canonicalize_url
+
+def test_canonical_url_ignores_trivial_differences():
+    assert canonicalize_url("HTTPS://Example.com:443?b=2&a=1&utm_source=x#top") == "https://example.com/?a=1&b=2"
+    assert canonicalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """
+    Storing past max_bytes evicts the entry that was read least recently.
+    """
+    cache = HttpCache(tmp_path, max_bytes=250)
+    cache.store("https://a.example/", b"a" * 100, etag='"a"')
+    cache.store("https://b.example/", b"b" * 100)
+    assert cache.read(cache.lookup("https://a.example/")) == b"a" * 100
+
+    cache.store("https://c.example/", b"c" * 100)
+
+    assert cache.lookup("https://b.example/") is None
+    assert cache.validators(cache.lookup("https://a.example/")) == {"If-None-Match": '"a"'}
+    assert cache.total_bytes() == 200 and cache.stats["evictions"] == 1
@@ -0,0 +1,68 @@
+# tests/test_metrics.py
+
+import urllib.request
+
+import pytest
+
+import credibility_analyzer
+import metrics
+
+ARTICLE = "The city council approved the new transit budget after a long public hearing on Tuesday. " * 10
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+def test_disabled_metrics_record_nothing():
+    metrics.reset()
+    histogram = metrics.histogram('test_disabled_seconds', "Test histogram.")
+
+    with histogram.time():
+        pass
+    histogram.observe(1.0)
+
+    assert metrics.snapshot()['test_disabled_seconds'] == {}
+
+def test_analysis_stages_are_timed_and_counted(enabled):
+    """
+    A scored text, a short input and a failed download each leave their trace.
+    """
+    credibility_analyzer.analyze_credibility(ARTICLE)
+    credibility_analyzer.analyze("Too short.")
+    credibility_analyzer.analyze("https://example.com/", downloaded="")
+
+    values = metrics.snapshot()
+    stages = values['credibility_stage_seconds']
+    assert {('analyze',), ('rules',), ('ml',), ('report',)} <= set(stages)
+    assert stages[('analyze',)]['count'] == 3
+    assert values['credibility_short_inputs_total'] == {(): 1}
+    assert values['credibility_errors_total'] == {('fetch_failed',): 1}
+
+def test_prometheus_text_over_http(enabled):
+    counter = metrics.counter('test_requests_total', "Test counter.", ['code'])
+    counter.inc('200', amount=3)
+    server = metrics.start_http_server(0)
+    try:
+        text = urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics").read().decode()
+    finally:
+        server.shutdown()
+
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{code="200"} 3' in text
+
+def test_states_of_several_processes_are_summed(enabled):
+    counter = metrics.counter('test_merged_total', "Test counter.", ['code'])
+    histogram = metrics.histogram('test_merged_seconds', "Test histogram.", buckets=(1.0,))
+    counter.inc('200', amount=2)
+    histogram.observe(0.5)
+    state = metrics.export_state()
+    counter.inc('500')
+    text = metrics.render_prometheus([state, metrics.export_state()])
+
+    assert 'test_merged_total{code="200"} 4' in text and 'test_merged_total{code="500"} 1' in text
+    assert 'test_merged_seconds_bucket{le="1.0"} 2' in text and 'test_merged_seconds_count 2' in text
+    assert 'test_merged_total{code="200"} 2' in metrics.render_prometheus()
@@ -0,0 +1,92 @@
+# tests/test_near_duplicates.py
+
+import os
+
+import credibility_analyzer
+from benchmarks.corpus import generate_corpus
+from near_duplicates import NearDuplicateIndex
+
+ARTICLES = [article['text'] for article in generate_corpus({'short': 0, 'medium': 1, 'large': 0})][:3]
+STORY = ARTICLES[0]
+# The same wire story as republished elsewhere: a new first sentence and a footer.
+COPY = "Updated at 10:42. " + STORY.replace("By Jane Doe and John Smith. ", "") + " Follow us for more news."
+
+def test_near_copies_match_and_different_texts_do_not():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(STORY, {'story': 0})
+    payload, similarity = index.lookup(COPY)
+    assert payload == {'story': 0} and 0.8 <= similarity < 1
+    assert index.lookup(ARTICLES[1]) is None
+    assert index.stats == {'matches': 1, 'misses': 1, 'evictions': 0}
+
+def test_index_is_persisted_and_bounded(tmp_path):
+    path = tmp_path / "near_duplicates.sqlite"
+    index = NearDuplicateIndex(path, max_entries=2)
+    for n, text in enumerate(ARTICLES):
+        index.add(text, {'story': n})
+    assert len(index) == 2 and index.stats['evictions'] == 1
+    index.close()
+
+    reopened = NearDuplicateIndex(path, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.lookup(ARTICLES[0]) is None
+    assert reopened.lookup(ARTICLES[2])[0] == {'story': 2}
+
+def test_lookup_skips_entries_of_other_versions():
+    """
+    A closer match from an old version must not hide one from the current version.
+    """
+    index = NearDuplicateIndex()
+    index.add(COPY, {'story': 'current'}, version="v2")
+    index.add(STORY, {'story': 'stale'}, version="v1")
+    assert index.lookup(STORY)[0] == {'story': 'stale'}
+    assert index.lookup(STORY, version="v2")[0] == {'story': 'current'}
+    assert index.lookup(STORY, version="v3") is None
+
+def test_forked_process_opens_its_own_connection(tmp_path):
+    path = tmp_path / "near_duplicates.sqlite"
+    index = NearDuplicateIndex(path)
+    index.add(ARTICLES[1], {'story': 1})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            index.add(STORY, {'story': 0})
+            os._exit(0 if index._db is not None and index.lookup(ARTICLES[1])[0] == {'story': 1} else 1)
+        except BaseException:
+            os._exit(1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert NearDuplicateIndex(path).lookup(COPY)[0] == {'story': 0}
+    assert index.lookup(ARTICLES[1])[0] == {'story': 1}
+
+def test_syndicated_copy_reuses_ml_but_rescores_domain(monkeypatch):
+    """
+    The copy on a low-credibility site skips the ML engine, keeps the text features and still gets its own domain penalty.
+    """
+    credibility_analyzer.set_near_duplicate_index(NearDuplicateIndex())
+    try:
+        first = credibility_analyzer.score_text(STORY, "https://www.reuters.com/world/story")
+        monkeypatch.setattr(credibility_analyzer, "text_sentiment", lambda text: (_ for _ in ()).throw(AssertionError("ML ran")))
+        copy = credibility_analyzer.score_text(COPY, "https://www.infowars.com/story", metadata={'author': "Jane Doe"})
+    finally:
+        credibility_analyzer.set_near_duplicate_index(None)
+    assert copy['ml_score'] == first['ml_score']
+    assert copy['features']['near_duplicate']['url'] == "https://www.reuters.com/world/story"
+    assert copy['features']['word_count'] == first['features']['word_count']
+    assert copy['features']['domain_tier'] == 'low_credibility' and copy['features']['author'] is True
+    assert copy['rule_score'] < first['rule_score']
+
+def test_processes_sharing_the_file_get_distinct_ids(tmp_path):
+    path = tmp_path / "near_duplicates.sqlite"
+    index = NearDuplicateIndex(path)
+    first = index.add(ARTICLES[1], {'story': 1})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if index.add(STORY, {'story': 0}) != first else 1)
+        except BaseException:
+            os._exit(1)
+    assert os.waitpid(pid, 0)[1] == 0
+    index.add(ARTICLES[2], {'story': 2})
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 3
+    assert [reopened.lookup(text)[0] for text in ARTICLES] == [{'story': 0}, {'story': 1}, {'story': 2}]
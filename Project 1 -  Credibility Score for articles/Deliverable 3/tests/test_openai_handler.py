@@ -0,0 +1,225 @@
+# tests/test_openai_handler.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import credibility_analyzer
+import metrics
+import openai_handler
+from response_cache import ResponseCache
+
+TOKENS = ["The", " sky", " is", " blue", "."]
+DELAY = 0.2
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Answers /v1/chat/completions like the OpenAI API, streaming TOKENS as
+    server-sent events with a pause after the first one. Models listed in
+    failing answer 500 and those in slow wait a second before answering.
+    """
+    protocol_version = "HTTP/1.1"
+    requests = []
+    failing = ()
+    slow = ()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        if body["model"] in self.slow:
+            time.sleep(1)
+        if body["model"] in self.failing:
+            payload = b'{"error": {"message": "overloaded", "type": "server_error"}}'
+            self.send_response(500)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        usage = {"prompt_tokens": 12, "completion_tokens": len(TOKENS), "total_tokens": 12 + len(TOKENS)}
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(TOKENS)}}],
+                "usage": usage}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        deltas = [{"role": "assistant", "content": ""}] + [{"content": token} for token in TOKENS] + [{}]
+        for i, delta in enumerate(deltas):
+            chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None if delta else "stop"}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if i == 1:
+                time.sleep(DELAY)
+        if body.get("stream_options", {}).get("include_usage"):
+            chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                     "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def client():
+    """
+    An OpenAI client talking to a local stand-in for the API.
+    """
+    FakeOpenAIHandler.requests = []
+    FakeOpenAIHandler.failing = FakeOpenAIHandler.slow = ()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield openai_handler.create_client(api_key="sk-test", base_url=f"http://127.0.0.1:{httpd.server_address[1]}/v1")
+    httpd.shutdown()
+
+def test_stream_yields_tokens_in_order(client):
+    messages = [{"role": "user", "content": "What colour is the sky?"}]
+    assert list(openai_handler.stream_openai_response(messages, client)) == TOKENS
+    assert FakeOpenAIHandler.requests[0]["stream"] is True
+    assert FakeOpenAIHandler.requests[0]["messages"] == messages
+
+def test_stream_records_first_token_and_total_latency(client):
+    """
+    The first token is timed before the server's pause, the total after it.
+    """
+    timings = {}
+    stream = openai_handler.stream_openai_response([{"role": "user", "content": "Hi"}], client, timings=timings)
+    assert next(stream) == "The"
+    assert timings["first_token"] is not None and timings["total"] is None
+    assert "".join(stream) == "".join(TOKENS[1:])
+    assert timings["first_token"] < DELAY <= timings["total"]
+
+def test_streamed_reply_is_cached_once_complete(client):
+    openai_handler.set_response_cache(ResponseCache())
+    try:
+        messages = [{"role": "user", "content": "What colour is the sky?"}]
+        assert "".join(openai_handler.stream_openai_response(messages, client)) == "".join(TOKENS)
+        assert list(openai_handler.stream_openai_response(messages, client)) == ["".join(TOKENS)]
+    finally:
+        openai_handler.set_response_cache(None)
+    assert len(FakeOpenAIHandler.requests) == 1
+
+def test_blocking_response_still_works(client):
+    assert openai_handler.get_openai_response([{"role": "user", "content": "Hi"}], client) == "".join(TOKENS)
+
+ARTICLE = "The city council approved the annual budget after a public hearing on Tuesday. " * 20
+
+def _report():
+    result = credibility_analyzer.new_result(ARTICLE)
+    result.update(final_score=72.5, rule_score=80.0, ml_score=55.0,
+                  rule_explanations=["Source: unlisted domain."], ml_explanations=["Objective language."])
+    return credibility_analyzer.render_report(result)
+
+def test_count_tokens_falls_back_to_estimate(monkeypatch):
+    monkeypatch.setattr(openai_handler, "_encoding", False)
+    assert openai_handler.count_tokens("abcd" * 10) == 10
+    assert openai_handler.count_tokens("a b c d e") == 5
+
+def test_old_reports_and_articles_are_compacted():
+    history = [{"role": "user", "content": ARTICLE}, {"role": "assistant", "content": _report()},
+               {"role": "user", "content": "Thanks!"}, {"role": "assistant", "content": "You're welcome."},
+               {"role": "user", "content": "Why was the score not higher?"}]
+    trimmed = openai_handler.trim_history(history, token_budget=10_000)
+    assert trimmed[0]["content"].startswith("[Pasted article of 260 words")
+    assert trimmed[1]["content"] == "[Credibility analysis report: final score 72.50 / 100 (rule-based 80.00, linguistic 55.00).]"
+    assert trimmed[2:] == history[2:]
+
+def test_latest_report_is_kept_verbatim():
+    history = [{"role": "user", "content": ARTICLE}, {"role": "assistant", "content": _report()},
+               {"role": "user", "content": "Explain the score."}]
+    assert openai_handler.trim_history(history, token_budget=10_000)[1:] == history[1:]
+
+def test_history_stays_within_budget():
+    """
+    However long the session, the prompt stays under the budget and keeps
+    the system prompt and the newest question.
+    """
+    history = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(200):
+        history += [{"role": "user", "content": f"Question {i} about the news today?"},
+                    {"role": "assistant", "content": f"Answer {i}: " + "some detail " * 30}]
+    history.append({"role": "user", "content": "Last question?"})
+    trimmed = openai_handler.trim_history(history, token_budget=500)
+    assert openai_handler.count_message_tokens(trimmed) <= 500
+    assert trimmed[0] == history[0] and trimmed[-1] == history[-1]
+    assert trimmed[-2] == history[-2]
+
+def test_recent_report_is_compacted_then_counted_again():
+    """
+    A recent report too long for the budget is kept as its summary when
+    that fits, and dropped when even the summary does not.
+    """
+    system = {"role": "system", "content": "You are a helpful assistant."}
+    question = {"role": "user", "content": "Explain the score."}
+    report = {"role": "assistant", "content": _report()}
+    history = [system, {"role": "user", "content": ARTICLE}, report, question]
+    summary = openai_handler.compact_message(report)
+    budget = openai_handler.count_message_tokens([system, summary, question])
+    assert openai_handler.trim_history(history, token_budget=budget) == [system, summary, question]
+    trimmed = openai_handler.trim_history(history, token_budget=budget - 1)
+    assert trimmed == [system, question]
+    assert openai_handler.count_message_tokens(trimmed) <= budget - 1
+
+def test_routing_sends_simple_questions_to_the_fast_model():
+    def ask(question):
+        return openai_handler.route_model([{"role": "user", "content": question}])
+    assert ask("Hi there!") == ("gpt-4o-mini", "simple")
+    assert ask("Why do people share fake news?") == ("gpt-4o", "complex")
+    assert ask("word " * 100) == ("gpt-4o", "long")
+    history = [{"role": "assistant", "content": _report()}, {"role": "user", "content": "Thanks, and the title?"}]
+    assert openai_handler.route_model(history) == ("gpt-4o", "report")
+
+def test_failed_model_falls_back_to_the_other(client):
+    FakeOpenAIHandler.failing = ("gpt-4o-mini",)
+    timings = {}
+    reply = openai_handler.get_openai_response([{"role": "user", "content": "Hi"}], client, timings=timings)
+    assert reply == "".join(TOKENS) and timings["model"] == "gpt-4o"
+    assert [r["model"] for r in FakeOpenAIHandler.requests] == ["gpt-4o-mini", "gpt-4o"]
+
+def test_slow_complete_reply_is_not_cut_off_by_the_slo(client, monkeypatch):
+    """
+    The SLO bounds the time to the first streamed token, not a reply fetched in one piece.
+    """
+    monkeypatch.setitem(openai_handler.ROUTING, "latency_slo", 0.3)
+    FakeOpenAIHandler.slow = ("gpt-4o",)
+    timings = {}
+    reply = openai_handler.get_openai_response([{"role": "user", "content": "Explain the score"}], client, timings=timings)
+    assert reply == "".join(TOKENS) and timings["model"] == "gpt-4o"
+    assert [r["model"] for r in FakeOpenAIHandler.requests] == ["gpt-4o"]
+
+def test_slow_stream_falls_back_within_the_slo(client, monkeypatch):
+    """
+    A model that misses the SLO before its first token is abandoned for the
+    other one; per-model latency and token usage are recorded.
+    """
+    monkeypatch.setitem(openai_handler.ROUTING, "latency_slo", 0.3)
+    FakeOpenAIHandler.slow = ("gpt-4o",)
+    metrics.enable()
+    metrics.reset()
+    try:
+        timings = {}
+        pieces = list(openai_handler.stream_openai_response(
+            [{"role": "user", "content": "Explain the score"}], client, timings=timings))
+        values = metrics.snapshot()
+    finally:
+        metrics.enable(False)
+    assert pieces == TOKENS and timings["model"] == "gpt-4o-mini"
+    assert timings["total"] < 1
+    assert values["openai_fallbacks_total"] == {("gpt-4o", "APITimeoutError"): 1}
+    assert values["openai_routed_requests_total"] == {("gpt-4o", "complex"): 1}
+    assert values["openai_usage_tokens_total"] == {("gpt-4o-mini", "prompt"): 12, ("gpt-4o-mini", "completion"): len(TOKENS)}
+    assert values["openai_response_seconds"][("gpt-4o-mini", "first_token")]["count"] == 1
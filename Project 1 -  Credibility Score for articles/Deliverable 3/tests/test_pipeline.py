@@ -0,0 +1,63 @@
+# tests/test_pipeline.py
+
+import io
+import json
+
+import credibility_analyzer
+import fetcher
+import pipeline
+from pipeline import Pipeline, parse_record
+
+ARTICLE = "The city council approved the new transit budget after a long public hearing on Tuesday. " * 10
+PAGE = f"<html><head><title>Budget approved</title></head><body><article><p>{ARTICLE}</p></article></body></html>"
+
+def test_parse_record_accepts_objects_strings_and_bare_lines():
+    assert parse_record('{"id": 7, "url": "https://example.com/a"}') == (7, "https://example.com/a")
+    assert parse_record('"plain text"') == (None, "plain text")
+    assert parse_record("https://example.com/b\n") == (None, "https://example.com/b")
+
+def test_every_record_comes_out_once(monkeypatch):
+    """
+    URLs go through all three stages, texts skip the download, and failures
+    (bad JSON, failed downloads, short texts) are reported instead of dropped.
+    """
+    monkeypatch.setattr(fetcher, 'fetch_url', lambda url: PAGE if url.endswith('/ok') else None)
+    lines = [json.dumps({'id': f"u{i}", 'url': f"https://news.example.com/{i}/ok"}) for i in range(20)]
+    lines += [json.dumps({'text': ARTICLE}), "https://news.example.com/missing", "Too short.", '{"url": ']
+
+    results = list(Pipeline(fetch_workers=4, extract_workers=2, score_workers=2, queue_size=2).run(iter(lines)))
+
+    by_index = {r['index']: r for r in results}
+    assert sorted(by_index) == list(range(len(lines)))
+    assert all(by_index[i]['title'] == "Budget approved" and by_index[i]['error'] is None for i in range(20))
+    assert by_index[20]['final_score'] is not None
+    assert [by_index[i]['error'] for i in (21, 22, 23)] == ['fetch_failed', 'too_short', 'invalid_record']
+
+def test_cli_streams_jsonl(monkeypatch, capsys):
+    monkeypatch.setattr('sys.stdin', io.StringIO(json.dumps({'id': 1, 'text': ARTICLE}) + "\n"))
+
+    pipeline.main([])
+
+    out, err = capsys.readouterr()
+    assert json.loads(out)['id'] == 1
+    assert err.startswith("queues fetch=0/64")
+
+def test_cli_output_stays_jsonl_when_urls_fail(monkeypatch, capsys, caplog):
+    """
+    Download and extraction errors are logged (to stderr), never mixed into the JSONL on stdout.
+    """
+    fetcher.set_fetcher(fetcher.AsyncFetcher(retries=0, timeout=5))
+    monkeypatch.setattr(credibility_analyzer, 'extract_article', lambda downloaded: 1 / 0)
+    monkeypatch.setattr('sys.stdin', io.StringIO("http://127.0.0.1:1/unreachable\n" + json.dumps({'text': ARTICLE}) + "\n"))
+    try:
+        pipeline.main([])
+        monkeypatch.setattr(fetcher, 'fetch_url', lambda url: PAGE)
+        monkeypatch.setattr('sys.stdin', io.StringIO("https://news.example.com/broken\n"))
+        pipeline.main([])
+    finally:
+        fetcher.set_fetcher(None)
+
+    # Results are written as they complete, so compare them without regard to order.
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(str(r['error']) for r in results) == ['None', 'fetch_failed', 'fetch_failed']
+    assert "Error fetching http://127.0.0.1:1/unreachable" in caplog.text and "Error extracting content" in caplog.text
@@ -0,0 +1,79 @@
+# tests/test_response_cache.py
+
+from types import SimpleNamespace
+
+import openai_handler
+from response_cache import ResponseCache, cosine, text_vector
+
+GREETING = {"role": "assistant", "content": "Hello! Ask me anything."}
+
+def ask(question):
+    return [GREETING, {"role": "user", "content": question}]
+
+class CountingClient:
+    """
+    Stands in for the OpenAI client and counts the completions requested.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, model, messages, stream=False):
+        self.calls += 1
+        message = SimpleNamespace(content=f"Reply {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+def test_exact_tier_ignores_case_and_whitespace(tmp_path):
+    """
+    Entries are found again after a restart; the model is part of the key.
+    """
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    cache.put(ask("What is a credibility score?"), "A number from 0 to 100.", "gpt-4o")
+    cache.close()
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    assert cache.get(ask("  what is a   credibility score?"), "gpt-4o") == "A number from 0 to 100."
+    assert cache.get(ask("What is a credibility score?"), "gpt-4o-mini") is None
+    assert cache.stats == {'exact_hits': 1, 'similar_hits': 0, 'misses': 1, 'evictions': 0}
+    assert cache.hit_rate() == 0.5
+
+def test_similarity_tier_needs_threshold_and_same_context():
+    cache = ResponseCache(similarity_threshold=0.7)
+    cache.put(ask("How is the credibility score calculated?"), "From rules and sentiment.")
+    assert cache.get(ask("How is the credibility score calculated exactly?")) == "From rules and sentiment."
+    assert cache.get(ask("What is the weather in Paris?")) is None
+    other_context = [{"role": "user", "content": "Hi"}] + ask("How is the credibility score calculated?")
+    assert cache.get(other_context) is None
+    assert ResponseCache().get(ask("How is the credibility score calculated exactly?")) is None
+
+def test_text_vector_is_unit_length_and_stable():
+    vector = text_vector("Fake news spreads fast, fake news!")
+    assert abs(cosine(vector, vector) - 1) < 1e-9
+    assert vector == text_vector("fake NEWS spreads fast fake news")
+    assert text_vector("") == {}
+
+def test_expired_and_evicted_entries_are_misses(tmp_path):
+    cache = ResponseCache(ttl=-1)
+    cache.put(ask("Hi"), "Hello")
+    assert cache.get(ask("Hi")) is None
+
+    cache = ResponseCache(tmp_path / "responses.sqlite", max_entries=2, similarity_threshold=0.5)
+    for question in ("one", "two", "three"):
+        cache.put(ask(question), question.upper())
+    assert len(cache) == 2 and cache.stats['evictions'] == 1
+    assert cache.get(ask("one")) is None and cache.get(ask("three")) == "THREE"
+    assert len(ResponseCache(tmp_path / "responses.sqlite")) == 2
+
+def test_handler_answers_repeated_questions_from_cache():
+    client = CountingClient()
+    openai_handler.set_response_cache(ResponseCache())
+    try:
+        first = openai_handler.get_openai_response(ask("Who made you?"), client)
+        second = openai_handler.get_openai_response(ask("who made you?"), client)
+        streamed = list(openai_handler.stream_openai_response(ask("Who made you?"), client))
+    finally:
+        openai_handler.set_response_cache(None)
+    assert first == second == "Reply 1" and streamed == ["Reply 1"]
+    assert client.calls == 1
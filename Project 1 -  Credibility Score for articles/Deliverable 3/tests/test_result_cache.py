@@ -0,0 +1,98 @@
+# tests/test_result_cache.py
+
+import os
+
+import credibility_analyzer
+from domain_blocklist import DomainBlocklist, build_blocklist
+from domain_index import DomainIndex
+from result_cache import ResultCache, result_key
+
+ARTICLE = "The regional health agency released its quarterly vaccination figures on Monday. " * 8
+
+def test_repeated_article_is_served_from_cache(tmp_path, monkeypatch):
+    """
+    Re-scoring the same text (whitespace aside) skips the scorers, even after a restart.
+    """
+    path = tmp_path / "results.sqlite"
+    credibility_analyzer.set_result_cache(ResultCache(path))
+    try:
+        first = credibility_analyzer.analyze(ARTICLE)
+
+        def fail(*args):
+            raise AssertionError("scorers should not run on a cache hit")
+        monkeypatch.setattr(credibility_analyzer, "text_sentiment", fail)
+        monkeypatch.setattr(credibility_analyzer.RULE_SCANNER, "scan", fail)
+        credibility_analyzer.set_result_cache(ResultCache(path))
+        second = credibility_analyzer.analyze("  " + ARTICLE.replace(" ", "\n", 3))
+    finally:
+        credibility_analyzer.set_result_cache(None)
+
+    assert second['final_score'] == first['final_score']
+    assert second['ml_explanations'] == first['ml_explanations']
+
+def test_expired_and_evicted_entries_are_misses():
+    cache = ResultCache(capacity=2, ttl=-1)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+    cache = ResultCache(capacity=2)
+    for key in "abc":
+        cache.put(key, key)
+    assert cache.get("a") is None and cache.get("c") == "c"
+    assert cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 1}
+
+def test_key_depends_on_title_and_domain():
+    assert result_key(ARTICLE, "A", "x.com") != result_key(ARTICLE, "B", "x.com")
+    assert result_key(ARTICLE, "A", "x.com") != result_key(ARTICLE, "A", "y.com")
+
+def test_cached_values_are_copies():
+    cache = ResultCache()
+    cache.put("a", {'features': {'word_count': 3}})
+    cache.get("a")['features']['word_count'] = 99
+    assert cache.get("a") == {'features': {'word_count': 3}}
+
+def test_version_follows_domain_index_changes(tmp_path):
+    """
+    Loading a blocklist into DOMAIN_INDEX changes the scoring version, so earlier cached scores are not reused.
+    """
+    before = credibility_analyzer.scoring_version()
+    assert credibility_analyzer.scoring_version() == before
+    feed = tmp_path / "feed.txt"
+    feed.write_text("fresh-hoax.example\n")
+    try:
+        credibility_analyzer.DOMAIN_INDEX.load_file(feed, 'low_credibility')
+        assert credibility_analyzer.scoring_version() != before
+    finally:
+        credibility_analyzer.rebuild_domain_index()
+    assert credibility_analyzer.scoring_version() == before
+
+def test_version_follows_domain_list_contents(tmp_path):
+    """
+    Different lists of the same size, and a blocklist file rebuilt in place, give different versions.
+    """
+    first, second = DomainIndex(), DomainIndex()
+    first.add_many(["a.example", "b.example"], 'low_credibility')
+    second.add_many(["b.example", "c.example"], 'low_credibility')
+    assert first.fingerprint() != second.fingerprint()
+    assert first.fingerprint() == DomainIndex.from_tiers({'low_credibility': ["b.example", "a.example"]}).fingerprint()
+
+    path = tmp_path / "low.cdbl"
+    build_blocklist(["a.example"], path)
+    blocklist = DomainBlocklist(path)
+    before = blocklist.fingerprint()
+    blocklist.close()
+    os.utime(path, ns=(1, 1))
+    assert DomainBlocklist(path).fingerprint() != before
+
+def test_forked_process_opens_its_own_connection(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite")
+    cache.put("parent", 1)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            cache.put("child", 2)
+            os._exit(0 if cache._pid == os.getpid() else 1)
+        except BaseException:
+            os._exit(1)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert cache.get("child") == 2 and cache.get("parent") == 1
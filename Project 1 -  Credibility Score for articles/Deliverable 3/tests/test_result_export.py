@@ -0,0 +1,33 @@
+# tests/test_result_export.py
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from credibility_analyzer import analyze
+from result_export import ParquetResultWriter, export_results
+
+ARTICLE = "Report by Jane Doe. The city council approved the new transit budget after a long public hearing. " * 10
+
+def test_results_are_written_as_typed_row_groups(tmp_path):
+    """
+    Scores, features and rule flags become typed columns, and failed inputs become nulls.
+    """
+    path = tmp_path / "scores.parquet"
+    results = [dict(analyze(ARTICLE), index=i) for i in range(5)] + [dict(analyze("Too short."), index=5, id=42)]
+
+    with ParquetResultWriter(path, row_group_size=2) as writer:
+        writer.write_many(results)
+
+    parquet = pq.ParquetFile(path)
+    table = parquet.read()
+    assert parquet.metadata.num_row_groups == 3
+    assert table.schema.field('word_count').type == pa.int32()
+    assert table.schema.field('author').type == pa.bool_()
+    assert table.column('author').to_pylist()[:5] == [True] * 5
+    assert table.column('subjectivity').to_pylist()[0] == results[0]['features']['subjectivity']
+    assert table.column('final_score').to_pylist()[5] is None
+    assert table.column('id').to_pylist()[5] == "42"
+    assert table.column('error').to_pylist()[5] == 'too_short'
+
+def test_export_results_counts_rows(tmp_path):
+    assert export_results(iter([analyze(ARTICLE)] * 3), tmp_path / "scores.parquet") == 3
@@ -0,0 +1,35 @@
+# tests/test_rules.py
+
+from rules import DEFAULT_RULES, RuleScanner
+
+def test_default_rules_in_one_scan():
+    """
+    One scan reports every feature, including a keyword that is also an ALL CAPS word.
+    """
+    text = "Report by Jane Doe. This is HUGE news!! See SOURCES below for more."
+
+    features = RuleScanner(DEFAULT_RULES).scan(text)
+
+    assert features == {'author': True, 'citations': True, 'all_caps': 2, 'exclamations': 2, 'word_count': 13}
+
+def test_window_limits_where_a_rule_may_match():
+    text = "Plain opening text. " * 30 + "Written by Jane Doe."
+
+    assert RuleScanner(DEFAULT_RULES).scan(text)['author'] is False
+    assert RuleScanner(DEFAULT_RULES).scan(text[-20:])['author'] is True
+
+def test_new_rule_is_scored_from_its_declaration():
+    """
+    A declared rule only needs keywords, a weight and explanations.
+    """
+    scanner = RuleScanner([{'name': 'hedging', 'keywords': ['allegedly', 'reportedly'], 'label': 'Hedging',
+                            'weight': 5, 'explanation': "Claims are attributed.", 'miss_weight': -2, 'miss_explanation': "No attribution."}])
+
+    assert scanner.score(scanner.scan("The mayor allegedly resigned.")) == (5, ["[+5] **Hedging**: Claims are attributed."])
+    assert scanner.score(scanner.scan("The mayor resigned.")) == (-2, ["[-2] **Hedging**: No attribution."])
+
+def test_metadata_field_sets_feature():
+    scanner = RuleScanner(DEFAULT_RULES)
+
+    assert scanner.scan("No byline in this text.", {'author': "Jane Doe"})['author'] is True
+    assert scanner.scan("No byline in this text.", {'author': None})['author'] is False
@@ -0,0 +1,104 @@
+# tests/test_scoring_service.py
+
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import scoring_service
+from benchmarks.load import run_load, start_service
+
+ARTICLE = "The regional health agency released its quarterly vaccination figures on Monday. " * 8
+
+def post(base, path, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(base + path, data, {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.fixture(scope="module")
+def service():
+    """
+    The service handlers on a single in-process server.
+    """
+    server = scoring_service.ScoringServer(("127.0.0.1", 0), scoring_service.ScoringHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_single_item_returns_structured_result(service):
+    status, result = post(service, "/v1/score", {"id": "a1", "text": ARTICLE})
+    assert status == 200
+    assert result["id"] == "a1" and result["error"] is None
+    assert 0 <= result["final_score"] <= 100 and result["rule_explanations"]
+
+def test_batch_keeps_item_order_and_reports_bad_items(service):
+    status, body = post(service, "/v1/score/batch", {"items": [ARTICLE, {"nope": 1}, {"text": "too short", "id": 7}]})
+    assert status == 200
+    results = body["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["error"] for r in results] == [None, "invalid_record", "too_short"]
+    assert results[2]["id"] == 7
+
+def test_malformed_requests_are_client_errors(service):
+    assert post(service, "/v1/score", b"{not json")[0] == 400
+    assert post(service, "/v1/score", {"url": 5}) == (400, {"error": "invalid_record", "error_detail": "item needs a 'url' or 'text' string"})
+    assert post(service, "/v1/score/batch", {"items": [ARTICLE] * (scoring_service.MAX_BATCH_ITEMS + 1)})[0] == 413
+    assert post(service, "/v1/nothing", {})[0] == 404
+
+def test_failures_while_scoring_are_server_errors(service, monkeypatch):
+    def analyze(user_input):
+        raise ValueError("model returned NaN")
+    monkeypatch.setattr(scoring_service.credibility_analyzer, "analyze", analyze)
+    assert post(service, "/v1/score", {"text": ARTICLE}) == (500, {"error": "internal_error", "error_detail": "ValueError: model returned NaN"})
+    assert post(service, "/v1/score", {"url": 5})[0] == 400
+
+def test_unknown_path_closes_the_connection(service):
+    host, port = service.rsplit("/", 1)[-1].split(":")
+    with socket.create_connection((host, int(port)), timeout=5) as connection:
+        connection.sendall(b"POST /v1/nothing HTTP/1.1\r\nHost: x\r\nContent-Length: 2\r\n\r\n{}")
+        response = connection.makefile("rb").read()
+    assert response.startswith(b"HTTP/1.1 404") and b"Connection: close" in response
+
+def raw_post(base, headers):
+    host, port = base.rsplit("/", 1)[-1].split(":")
+    with socket.create_connection((host, int(port)), timeout=5) as connection:
+        connection.sendall(("POST /v1/score HTTP/1.1\r\nHost: x\r\n" + headers + "\r\n").encode())
+        return int(connection.makefile("rb").readline().split()[1])
+
+def test_missing_or_invalid_content_length_is_rejected(service):
+    assert raw_post(service, "") == 411
+    assert raw_post(service, "Content-Length: -1\r\n") == 400
+    assert raw_post(service, "Content-Length: ten\r\n") == 400
+
+def test_preforked_service_under_load(monkeypatch):
+    """
+    /metrics counts the requests of every worker, not just the one that answers the scrape.
+    """
+    monkeypatch.setenv("CREDIBILITY_METRICS", "1")
+    process, url = start_service(workers=2)
+    try:
+        with urllib.request.urlopen(url + "/healthz") as response:
+            assert json.loads(response.read())["status"] == "ok"
+        stats = run_load(url, [ARTICLE], requests=20, concurrency=4)
+        deadline = time.monotonic() + 5
+        while True:
+            with urllib.request.urlopen(url + "/metrics") as response:
+                text = response.read().decode()
+            if 'scoring_service_requests_total{endpoint="/v1/score",status="200"} 20' in text or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+    finally:
+        process.terminate()
+        process.wait()
+    assert stats["errors"] == 0 and stats["requests_per_s"] > 0
+    assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["max"]
+    assert 'scoring_service_requests_total{endpoint="/v1/score",status="200"} 20' in text